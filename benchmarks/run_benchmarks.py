@@ -0,0 +1,140 @@
+"""
+Times each pipeline stage on synthetic data and writes the results as JSON.
+
+Usage:
+    python benchmarks/run_benchmarks.py --sizes 100 10000 1000000 --output bench_results.json
+
+Geocoding is stubbed with local lookups so no stage touches the network.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "data collection"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+import normalizeData
+from featureEngineering import add_custom_features
+from huffModel import demand_points, huff_market_share
+from siteOptimizer import select_sites
+from success_labeling import prepare_labeling_features, label_success
+from tractPreprocessor import TractPreprocessor, score_new_tracts
+from tractSchema import apply_schema, memory_mb, read_tract_table
+from synthetic import make_tracts, make_pois, make_shops
+
+
+def stub_geocoding(shops):
+    """Replaces reverse geocoding with lookups into the synthetic data."""
+    city_by_point = {(round(lat, 5), round(lon, 5)): city for lat, lon, city in zip(shops['lat'], shops['lon'], shops['city'])}
+    normalizeData.extract_city = lambda lat, lon: city_by_point.get((round(lat, 5), round(lon, 5)), '')
+    normalizeData.extract_county = lambda lat, lon: 'wayne'
+
+
+def timed(results, stage, func, *args, **kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        value = func(*args, **kwargs)
+    results[stage] = round(time.perf_counter() - start, 6)
+    print(f"  {stage:<22} {results[stage]:>10.3f}s", file=sys.__stdout__)
+    return value
+
+
+def run_size(n, workdir, n_shops, max_map_rows):
+    results = {}
+    raw_path = os.path.join(workdir, f"tracts_{n}.csv")
+    shops_path = os.path.join(workdir, f"shops_{n}.csv")
+
+    tracts = make_tracts(n)
+    tracts.to_csv(raw_path, index=False)
+    # Leave about half the cities without a shop so training sees both classes
+    shops, reviews = make_shops(max(1, min(n_shops, tracts['City'].nunique() // 2)))
+    shops.to_csv(shops_path, index=False)
+    stub_geocoding(shops)
+
+    preprocessor_path = os.path.join(workdir, "preprocessor.joblib")
+    model_path = os.path.join(workdir, "model.joblib")
+
+    cleaned = timed(results, "cleaning", normalizeData.clean_and_prepare_dataset, raw_path,
+                    os.path.join(workdir, "cleaned.csv"), preprocessor_path=preprocessor_path)
+    features = timed(results, "add_custom_features", add_custom_features, cleaned)
+    # Feature table footprint as loaded by plain read_csv vs. the compact tract schema
+    results["table_mb_default"] = round(memory_mb(features), 3)
+    results["table_mb_schema"] = round(memory_mb(apply_schema(features.copy())), 3)
+
+    shop_features = timed(results, "shop_labeling_prepare", prepare_labeling_features, shops, reviews)
+    timed(results, "shop_labeling", label_success, shop_features)
+    labeled = timed(results, "tract_labeling", normalizeData.label_success_from_known_shops, features, shops_path)
+
+    scored = timed(results, "training", normalizeData.train_success_prediction_model, labeled,
+                   preprocessor_path=preprocessor_path, model_path=model_path)
+    timed(results, "scoring", score_new_tracts, read_tract_table(raw_path), model_path)
+
+    # One point of interest per tract; the cafes are the Huff competitors
+    pois = make_pois(n)
+    competitors = pois.loc[pois['type'] == 'cafe', ['lat', 'lon']]
+    demand = demand_points(cleaned, preprocessor=TractPreprocessor.load(preprocessor_path))
+    timed(results, "huff_market_share", huff_market_share, cleaned, competitors, demand=demand)
+    timed(results, "site_selection", select_sites, scored, k=10)
+
+    if n <= max_map_rows:
+        try:
+            from createMap import create_yemeni_coffee_success_map_with_predictions
+        except ImportError as e:
+            print(f"  map_rendering skipped ({e})")
+        else:
+            scored['success_score'] = scored['predicted_success_prob']
+            timed(results, "map_rendering", create_yemeni_coffee_success_map_with_predictions,
+                  scored, shops, scored, os.path.join(workdir, "map.html"))
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cafe-compass pipeline on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--shops", type=int, default=40, help="Known shops used for labeling")
+    parser.add_argument("--max-map-rows", type=int, default=10_000, help="Skip map rendering above this size")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": {}
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            print(f"{n} tracts")
+            report["results"][str(n)] = run_size(n, workdir, args.shops, args.max_map_rows)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Benchmark results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# Southeast Michigan bounding box used for synthetic coordinates
+LAT_RANGE = (41.9, 43.0)
+LON_RANGE = (-84.0, -82.4)
+COUNTY_FIPS = [163, 125, 99, 161, 115, 93, 147, 123, 57, 151]
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+REVIEW_WORDS = ['good', 'great', 'excellent', 'awesome', 'coffee', 'tea', 'cozy', 'slow', 'friendly',
+                'pricey', 'clean', 'busy', 'sweet', 'cardamom', 'qishr', 'adeni', 'service', 'parking']
+
+
+def _n_cities(n):
+    return max(5, n // 20)
+
+
+def make_tracts(n, seed=0, missing_fraction=0.05):
+    """
+    Synthetic tracts with the same columns as completeCafeCompassData.csv (including GEOID).
+
+    About missing_fraction of rows have no POI counts or coordinates, like tracts whose collection
+    didn't finish.
+    """
+    rng = np.random.default_rng(seed)
+    county = rng.choice(COUNTY_FIPS, n)
+    tract_code = np.arange(1, n + 1)
+    df = pd.DataFrame({
+        'Tract Code (id)': tract_code,
+        'City': [f"City {i}" for i in rng.integers(0, _n_cities(n), n)],
+        'Median Age': rng.normal(39, 6, n).round(1),
+        'Median Household Income': rng.lognormal(11.1, 0.45, n).round().astype(int),
+        'Percent People in Poverty': rng.beta(2, 12, n),
+        'Population Density (Persons/Acre)': rng.gamma(2.0, 2.5, n),
+        '# of Nearby Restaurants': rng.poisson(12, n).astype(float),
+        '# of Nearby Coffee Shops': rng.poisson(5, n).astype(float),
+        '# of Nearby Mosques': rng.poisson(0.6, n).astype(float),
+        'lat': rng.uniform(*LAT_RANGE, n),
+        'lon': rng.uniform(*LON_RANGE, n),
+        'transit_stops': rng.poisson(3, n).astype(float),
+        'pedestrian_score': rng.gamma(1.5, 0.6, n),
+        'county_id': county.astype(float),
+    })
+    df['GEOID'] = pd.array(26 * 10**9 + county * 10**6 + tract_code * 100, dtype='Int64')
+
+    missing = rng.random(n) < missing_fraction
+    df.loc[missing, ['# of Nearby Restaurants', '# of Nearby Coffee Shops', '# of Nearby Mosques',
+                     'lat', 'lon', 'pedestrian_score']] = np.nan
+    return df
+
+
+def make_pois(n, seed=1):
+    """Synthetic points of interest (restaurants, cafes, mosques) for the same area."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'poi_id': np.arange(n),
+        'type': rng.choice(['restaurant', 'cafe', 'mosque'], n, p=[0.6, 0.33, 0.07]),
+        'lat': rng.uniform(*LAT_RANGE, n),
+        'lon': rng.uniform(*LON_RANGE, n),
+    })
+
+
+def _hours_text(rng):
+    open_hour = int(rng.integers(6, 11))
+    close_hour = int(rng.integers(7, 13))
+    close_meridiem = 'AM' if close_hour == 12 else 'PM'
+    return [f"{day}: {open_hour}:00 AM – {close_hour}:00 {close_meridiem}" for day in DAYS]
+
+
+def make_shops(n, seed=2, reviews_per_shop=5):
+    """
+    Synthetic Yemeni coffee shops (lean shop table) and their review table keyed by place_id.
+
+    Every shop sits in its own city so joining shops onto tracts by city stays one-to-one.
+    """
+    rng = np.random.default_rng(seed)
+    place_ids = [f"synthetic:{i}" for i in range(n)]
+    shops = pd.DataFrame({
+        'place_id': place_ids,
+        'name': [f"Shop {i}" for i in range(n)],
+        'address': [f"{i} Main St" for i in range(n)],
+        'lat': rng.uniform(*LAT_RANGE, n),
+        'lon': rng.uniform(*LON_RANGE, n),
+        'county': rng.choice(['wayne', 'oakland', 'macomb', 'washtenaw'], n),
+        'rating': rng.uniform(3.2, 5.0, n).round(1),
+        'user_ratings_total': rng.integers(5, 2000, n),
+        'price_level': rng.choice([1.0, 2.0, 3.0, np.nan], n),
+        'business_status': rng.choice(['OPERATIONAL', 'CLOSED_TEMPORARILY'], n, p=[0.95, 0.05]),
+        'hours': [_hours_text(rng) for _ in range(n)],
+        'city': [f"city {i}" for i in range(n)],
+    })
+    shops['isSuccessful'] = rng.integers(0, 2, n)
+
+    n_reviews = n * reviews_per_shop
+    reviews = pd.DataFrame({
+        'place_id': np.repeat(place_ids, reviews_per_shop),
+        'text': [' '.join(rng.choice(REVIEW_WORDS, 12)) for _ in range(n_reviews)],
+        'rating': rng.integers(1, 6, n_reviews),
+        'time': rng.integers(1_600_000_000, 1_730_000_000, n_reviews),
+    })
+    return shops, reviews
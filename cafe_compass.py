@@ -0,0 +1,421 @@
+"""
+Command line entry point for every pipeline stage.
+
+    python cafe_compass.py <command> [options]
+    python cafe_compass.py --help
+
+Each command imports only the modules it needs, so light commands (score, map) don't pay for
+geopandas, osmnx or the Google clients.
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.join(ROOT, "data collection"))
+
+
+def read_csv(path, **kwargs):
+    import pandas as pd
+    return pd.read_csv(path, **kwargs)
+
+
+def read_tracts(path):
+    """Tract CSVs are loaded in the compact schema (float32 measures, categoricals)."""
+    from tractSchema import read_tract_table
+    return read_tract_table(path)
+
+
+def write_csv(df, path):
+    df.to_csv(path, index=False)
+    print(f"✅ Saved {len(df)} rows to {path}")
+
+
+# --- Data collection ---
+
+def cmd_shops(args):
+    import googlemaps
+    from http_backend import install
+    from review_store import split_reviews, save_review_table
+    from yemeniCoffeeShopData import collect_yemeni_coffee_shops, determine_successful_businesses
+
+    cassette = install(args.http_mode)
+    key = os.getenv("GOOGLE_MAPS_API_KEY")
+    if not key and cassette is not None:
+        key = "AIza-replay"  # Placeholder; keys are stripped from cassette lookups
+    gmaps = googlemaps.Client(key=key)
+
+    df_shops, df_reviews = split_reviews(collect_yemeni_coffee_shops(gmaps, cache_path=args.details_cache))
+    save_review_table(df_reviews, args.reviews)
+    write_csv(determine_successful_businesses(df_shops, reviews=df_reviews), args.output)
+
+
+def cmd_centroids(args):
+    from centroidData_to_csv import add_centroids_to_csv
+    add_centroids_to_csv(args.input, args.output, args.census_csv)
+
+
+def cmd_places(args):
+    from http_backend import install
+    from placeData_to_csv import update_nearby_places_counts
+    install(args.http_mode)
+    update_nearby_places_counts(args.input, args.output)
+
+
+def cmd_isochrones(args):
+    from isochrones import add_isochrone_place_counts, download_pois
+    if not os.path.exists(args.pois):
+        download_pois(output_csv=args.pois)
+    add_isochrone_place_counts(args.input, args.output, args.pois, args.drive_minutes, args.walk_minutes,
+                               cache_dir=args.graph_cache, polygons_csv=args.polygons, max_workers=args.workers)
+
+
+def cmd_mobility(args):
+    from http_backend import install
+    from pedestrian_to_csv import add_mobility_features
+    install(args.http_mode)
+    add_mobility_features(args.input, args.output, args.radius, args.workers)
+
+
+def cmd_rent(args):
+    from add_rent_data import add_rent_data
+    add_rent_data(args.input, args.output, args.rent_table, args.source)
+
+
+def cmd_census(args):
+    from census_loader import build_tract_store
+    build_tract_store(args.acs, args.tiger, args.output)
+
+
+def cmd_demographics(args):
+    from census_loader import DEMOGRAPHIC_COLUMNS, attach_demographics, load_tract_store
+    from geoid import read_tract_csv
+    store = load_tract_store(args.store, columns=list(DEMOGRAPHIC_COLUMNS))
+    write_csv(attach_demographics(read_tract_csv(args.input), store), args.output)
+
+
+def cmd_trends(args):
+    from http_backend import install
+    from trends import build_city_trends_table
+    install(args.http_mode)
+    print(build_city_trends_table(args.cities, table_path=args.output))
+
+
+# --- Modeling ---
+
+def cmd_clean(args):
+    from http_backend import install
+    from normalizeData import clean_and_prepare_dataset
+    install(args.http_mode)
+    clean_and_prepare_dataset(args.input, args.output, chunksize=args.chunksize,
+                              preprocessor_path=args.preprocessor)
+    print(f"✅ Cleaned data saved to {args.output}")
+
+
+def cmd_features(args):
+    from featureEngineering import add_custom_features, refresh_custom_features
+    df = read_tracts(args.input)
+    df = refresh_custom_features(df, args.cache) if args.cache else add_custom_features(df)
+    write_csv(df, args.output)
+
+
+def cmd_huff(args):
+    from huffModel import add_huff_features, demand_points, load_competitors
+    competitors = load_competitors(shops_csv=args.shops, pois_csv=args.pois)
+    df = read_tracts(args.input)
+    preprocessor = None
+    if args.scaled_with:
+        from tractPreprocessor import TractPreprocessor
+        preprocessor = TractPreprocessor.load(args.scaled_with)
+    df = add_huff_features(df, competitors, demand=demand_points(df, preprocessor=preprocessor),
+                           decay=args.decay, cutoff_km=args.cutoff_km)
+    write_csv(df, args.output)
+
+
+def cmd_label(args):
+    from http_backend import install
+    from normalizeData import label_success_from_known_shops
+    install(args.http_mode)
+    write_csv(label_success_from_known_shops(read_tracts(args.input), args.shops), args.output)
+
+
+def cmd_train(args):
+    from normalizeData import train_success_prediction_model
+    competitors = None
+    if args.shops or args.pois:
+        from huffModel import load_competitors
+        competitors = load_competitors(shops_csv=args.shops, pois_csv=args.pois)
+    df = train_success_prediction_model(read_tracts(args.input), preprocessor_path=args.preprocessor,
+                                        model_path=args.model, cv=args.cv, n_splits=args.folds,
+                                        report_path=args.report, competitors=competitors)
+    print(f"✅ Model bundle saved to {args.model}")
+    write_csv(df, args.output)
+
+
+def cmd_score(args):
+    from tractPreprocessor import score_new_tracts
+    write_csv(score_new_tracts(read_tracts(args.input), args.model), args.output)
+
+
+def cmd_map(args):
+    from createMap import create_yemeni_coffee_success_map_with_predictions
+    scored = read_tracts(args.input)
+    if 'success_score' not in scored.columns:
+        scored['success_score'] = scored['predicted_success_prob']
+    create_yemeni_coffee_success_map_with_predictions(
+        neighborhood_data=scored,
+        known_shop_locations=read_csv(args.shops, usecols=['name', 'lat', 'lon']),
+        model_predictions=scored,
+        output_path=args.output
+    )
+
+
+def cmd_sites(args):
+    from siteOptimizer import grid_candidates, select_sites
+    candidates = read_tracts(args.input)
+    if args.grid_km:
+        candidates = grid_candidates(candidates, cell_km=args.grid_km)
+    sites = select_sites(candidates, k=args.k, catchment_km=args.catchment_km,
+                         min_spacing_km=args.min_spacing_km, overlap_penalty=args.overlap_penalty)
+    shown = ['pick_rank', 'Tract Code (id)', 'City', 'lat', 'lon', 'tracts', 'predicted_success_prob', 'marginal_gain']
+    print(sites[[c for c in shown if c in sites.columns]].to_string(index=False))
+    write_csv(sites, args.output)
+
+
+def cmd_snapshot(args):
+    from snapshotStore import save_snapshot
+    df = read_tracts(args.input) if args.table == 'tracts' else read_csv(args.input)
+    save_snapshot(df, args.table, date=args.date, snapshot_dir=args.dir)
+
+
+def snapshot_diff(table, old, new, snapshot_dir):
+    """Diff of two snapshots of a table (default: the latest one against the one before it)."""
+    from snapshotStore import SNAPSHOT_KEYS, diff_snapshots, load_snapshot, previous_snapshot_date
+    old = old or previous_snapshot_date(table, new, snapshot_dir)
+    if old is None:
+        return None
+    return diff_snapshots(load_snapshot(table, old, snapshot_dir), load_snapshot(table, new, snapshot_dir),
+                          key=SNAPSHOT_KEYS[table])
+
+
+def cmd_diff(args):
+    from snapshotStore import summarize_diff
+    diff = snapshot_diff(args.table, args.old, args.new, args.dir)
+    if diff is None:
+        sys.exit(f"Need two {args.table} snapshots in {args.dir} to diff")
+    print(summarize_diff(diff).to_string())
+    write_csv(diff, args.output)
+
+
+def cmd_refresh(args):
+    import pandas as pd
+    from snapshotStore import list_snapshots, load_snapshot, previous_snapshot_date, snapshot_as_of, tracts_to_refresh
+    tract_dates = list_snapshots('tracts', args.dir)
+    if not tract_dates:
+        sys.exit(f"No tract snapshots in {args.dir}")
+    new = args.new or tract_dates[-1]
+    old = args.old or previous_snapshot_date('tracts', new, args.dir)
+    tracts = load_snapshot('tracts', new, args.dir)
+    tract_diff = snapshot_diff('tracts', old, new, args.dir) if old else None
+
+    # Shops over the same window: the shop snapshots in effect on the old and new tract dates
+    shop_diff, shops = None, None
+    shops_old = snapshot_as_of('shops', old, args.dir) if old else None
+    shops_new = snapshot_as_of('shops', new, args.dir)
+    if shops_old and shops_new and shops_old != shops_new:
+        shop_diff = snapshot_diff('shops', shops_old, shops_new, args.dir)
+        # Closed shops only appear in the older snapshot
+        shops = pd.concat([load_snapshot('shops', shops_new, args.dir), load_snapshot('shops', shops_old, args.dir)])
+    refresh = tracts_to_refresh(tracts, tract_diff, shops, shop_diff, radius_km=args.radius_km)
+    write_csv(refresh, args.output)
+
+
+def cmd_rescore(args):
+    from snapshotStore import rescore_changed
+    raw = read_tracts(args.input)
+    changed = read_csv(args.changes, usecols=['GEOID'])['GEOID']
+    write_csv(rescore_changed(raw, read_tracts(args.previous), changed, args.model), args.output)
+
+
+def cmd_deltas(args):
+    from snapshotStore import add_trend_features, load_snapshot, previous_snapshot_date
+    previous_date = args.previous or previous_snapshot_date('tracts', None, args.dir)
+    if previous_date is None:
+        sys.exit(f"Need an earlier tracts snapshot in {args.dir} to compute changes against")
+    previous = load_snapshot('tracts', previous_date, args.dir)
+    write_csv(add_trend_features(read_tracts(args.input), previous), args.output)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cafe-compass", description="Cafe Compass pipeline stages.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    def command(name, func, help, network=False):
+        sub = commands.add_parser(name, help=help, description=help)
+        sub.set_defaults(func=func)
+        if network:
+            sub.add_argument("--http-mode", choices=['live', 'record', 'replay', 'auto'], default=None,
+                             help="Record/replay external calls (default: $CAFE_COMPASS_HTTP_MODE or live)")
+        return sub
+
+    sub = command("shops", cmd_shops, "Collect Yemeni coffee shops from Google Places and label them", network=True)
+    sub.add_argument("--output", default="yemeniCoffeeShops_with_success.csv")
+    sub.add_argument("--reviews", default="yemeniCoffeeShopReviews.csv")
+    sub.add_argument("--details-cache", default="placeDetailsCache.json")
+
+    sub = command("centroids", cmd_centroids, "Add tract centroids (lat/lon) to a tract CSV")
+    sub.add_argument("input")
+    sub.add_argument("output")
+    sub.add_argument("--census-csv", required=True, help="Census tract CSV with centroid coordinates")
+
+    sub = command("places", cmd_places, "Count nearby mosques, restaurants and coffee shops per tract", network=True)
+    sub.add_argument("input")
+    sub.add_argument("output")
+
+    sub = command("isochrones", cmd_isochrones, "Count nearby places from local drive/walk isochrones (no Google calls)")
+    sub.add_argument("input")
+    sub.add_argument("output")
+    sub.add_argument("--pois", default="osmPois.csv", help="POI table (type, lat, lon); downloaded from OSM if missing")
+    sub.add_argument("--drive-minutes", type=float, default=10)
+    sub.add_argument("--walk-minutes", type=float, default=15)
+    sub.add_argument("--graph-cache", default="osmGraphs")
+    sub.add_argument("--polygons", default=None, help="Also save each tract's isochrones as WKT")
+    sub.add_argument("--workers", type=int, default=None)
+
+    sub = command("mobility", cmd_mobility, "Add transit stop counts and pedestrian scores", network=True)
+    sub.add_argument("input")
+    sub.add_argument("output")
+    sub.add_argument("--radius", type=int, default=1609, help="Transit stop search radius in meters")
+    sub.add_argument("--workers", type=int, default=None, help="Processes for pedestrian scores")
+
+    sub = command("rent", cmd_rent, "Join county rent onto a tract CSV")
+    sub.add_argument("input")
+    sub.add_argument("output")
+    sub.add_argument("--rent-table", required=True, help="Rent table (county FIPS + rent columns)")
+    sub.add_argument("--source", default="file")
+
+    sub = command("census", cmd_census, "Build the tract demographics store from ACS and TIGER files")
+    sub.add_argument("--acs", nargs="+", required=True)
+    sub.add_argument("--tiger", required=True)
+    sub.add_argument("--output", default="tractDemographics.parquet")
+
+    sub = command("demographics", cmd_demographics, "Fill the demographic columns of a tract CSV from the census store")
+    sub.add_argument("input")
+    sub.add_argument("output")
+    sub.add_argument("--store", default="tractDemographics.parquet", help="Store written by the census command")
+
+    sub = command("trends", cmd_trends, "Fill the city coffee search-interest table", network=True)
+    sub.add_argument("cities", nargs="+")
+    sub.add_argument("--output", default="cityCoffeeTrends.csv")
+
+    sub = command("clean", cmd_clean, "Clean, bracket and normalize the raw tract CSV", network=True)
+    sub.add_argument("input")
+    sub.add_argument("--output", default="cleaned_normalized_data.csv")
+    sub.add_argument("--chunksize", type=int, default=None, help="Stream the file in chunks of this many rows")
+    sub.add_argument("--preprocessor", default="tract_preprocessor.joblib")
+
+    sub = command("features", cmd_features, "Add the registered custom features")
+    sub.add_argument("input")
+    sub.add_argument("--output", default="features_added_data.csv")
+    sub.add_argument("--cache", default=None, help="Feature cache for incremental refresh")
+
+    sub = command("huff", cmd_huff, "Add Huff-model market share against existing cafes and Yemeni shops")
+    sub.add_argument("input")
+    sub.add_argument("--shops", default=None, help="Known Yemeni shop CSV (lat, lon)")
+    sub.add_argument("--pois", default=None, help="POI table whose cafes count as competitors")
+    sub.add_argument("--decay", type=float, default=2.0, help="Distance-decay exponent")
+    sub.add_argument("--cutoff-km", type=float, default=10.0)
+    sub.add_argument("--scaled-with", default=None,
+                     help="Preprocessor that min-max scaled the input, to weight demand by raw density")
+    sub.add_argument("--output", default="features_added_data.csv")
+
+    sub = command("label", cmd_label, "Label tracts from known Yemeni coffee shops", network=True)
+    sub.add_argument("input")
+    sub.add_argument("--shops", required=True, help="Shop CSV with lat, lon and isSuccessful")
+    sub.add_argument("--output", default="labeled_data.csv")
+
+    sub = command("train", cmd_train, "Train the success model and score every tract")
+    sub.add_argument("input")
+    sub.add_argument("--model", default="success_model.joblib")
+    sub.add_argument("--preprocessor", default="tract_preprocessor.joblib")
+    sub.add_argument("--output", default="final_scored_with_predictions.csv")
+    sub.add_argument("--cv", choices=['county', 'grid'], default=None,
+                     help="Spatially blocked cross-validation instead of a random holdout")
+    sub.add_argument("--folds", type=int, default=5)
+    sub.add_argument("--report", default="model_evaluation.json")
+    sub.add_argument("--shops", default=None, help="Known Yemeni shop CSV; adds the Huff market share feature")
+    sub.add_argument("--pois", default=None, help="POI table whose cafes also count as Huff competitors")
+
+    sub = command("score", cmd_score, "Score raw tracts with a saved model bundle (no refitting)")
+    sub.add_argument("input")
+    sub.add_argument("--model", default="success_model.joblib")
+    sub.add_argument("--output", default="scored_tracts.csv")
+
+    sub = command("sites", cmd_sites, "Pick the best K new shop sites, penalizing overlapping catchments")
+    sub.add_argument("input", help="Scored tract CSV with lat, lon and predicted_success_prob")
+    sub.add_argument("-k", type=int, default=10)
+    sub.add_argument("--grid-km", type=float, default=None, help="Aggregate tracts into grid cells of this size")
+    sub.add_argument("--catchment-km", type=float, default=3.0)
+    sub.add_argument("--min-spacing-km", type=float, default=1.0)
+    sub.add_argument("--overlap-penalty", type=float, default=1.0)
+    sub.add_argument("--output", default="selected_sites.csv")
+
+    sub = command("map", cmd_map, "Render the interactive success map")
+    sub.add_argument("input", help="Scored tract CSV with predicted_success_prob")
+    sub.add_argument("--shops", required=True, help="Shop CSV with name, lat and lon")
+    sub.add_argument("--output", default="yemeni_coffee_success_map_with_predictions.html")
+
+    sub = command("snapshot", cmd_snapshot, "Store a dated snapshot of a collected table")
+    sub.add_argument("table", choices=['tracts', 'shops'])
+    sub.add_argument("input")
+    sub.add_argument("--date", default=None, help="Run date YYYY-MM-DD (default: today)")
+    sub.add_argument("--dir", default="snapshots")
+
+    sub = command("diff", cmd_diff, "List rows added, removed or changed between two snapshots")
+    sub.add_argument("table", choices=['tracts', 'shops'])
+    sub.add_argument("--old", default=None, help="Older snapshot date (default: the one before --new)")
+    sub.add_argument("--new", default=None, help="Newer snapshot date (default: the latest)")
+    sub.add_argument("--dir", default="snapshots")
+    sub.add_argument("--output", default="snapshot_diff.csv")
+
+    sub = command("refresh", cmd_refresh, "Tracts to re-collect and rescore after the latest snapshots")
+    sub.add_argument("--old", default=None,
+                     help="Start of the window (default: the tract snapshot before --new); shops are diffed "
+                          "between the snapshots in effect on --old and --new")
+    sub.add_argument("--new", default=None, help="End of the window (default: the latest tract snapshot)")
+    sub.add_argument("--dir", default="snapshots")
+    sub.add_argument("--radius-km", type=float, default=10.0, help="Shop changes affect tracts within this distance")
+    sub.add_argument("--output", default="refresh_tracts.csv")
+
+    sub = command("rescore", cmd_rescore, "Rescore only changed tracts, reusing the previous scores")
+    sub.add_argument("input", help="Current raw tract CSV")
+    sub.add_argument("--previous", required=True, help="Previous scored tract CSV")
+    sub.add_argument("--changes", required=True, help="CSV with the GEOIDs to rescore (diff or refresh output)")
+    sub.add_argument("--model", default="success_model.joblib")
+    sub.add_argument("--output", default="scored_tracts.csv")
+
+    sub = command("deltas", cmd_deltas, "Add change-since-last-snapshot trend features")
+    sub.add_argument("input")
+    sub.add_argument("--previous", default=None, help="Tract snapshot date to compare with (default: the one before the latest)")
+    sub.add_argument("--dir", default="snapshots")
+    sub.add_argument("--output", default="features_with_trends.csv")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not hasattr(args, 'http_mode'):
+        args.func(args)
+        return
+    # Network commands report where their time went, also when a run fails partway
+    from instrumentation import save_profile
+    try:
+        args.func(args)
+    finally:
+        save_profile(args.command)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,9 @@
+import html
 import folium
 import pandas as pd
 import branca
 from folium.plugins import MarkerCluster
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.cluster import DBSCAN
 
 def create_yemeni_coffee_success_map_with_predictions(
     neighborhood_data, 
@@ -48,10 +47,15 @@ def create_yemeni_coffee_success_map_with_predictions(
         success_prob = row['predicted_success_prob']
         success_color = colormap(success_prob)  # Use the color scale based on prediction
 
+        popup_html = f"Predicted Success Probability: {success_prob:.2f}<br>City: {html.escape(str(row['City']))}"
+        # Top contributing features, precomputed when the tracts were scored
+        if isinstance(row.get('top_features'), str) and row['top_features']:
+            popup_html += "<br>Top factors:<br>" + "<br>".join(html.escape(f) for f in row['top_features'].split("; "))
+
         folium.CircleMarker(
             location=[row['lat'], row['lon']],
             radius=8,
-            popup=folium.Popup(f"Predicted Success Probability: {success_prob:.2f}<br>City: {row['City']}", parse_html=True),
+            popup=folium.Popup(popup_html),
             color=success_color,
             fill=True,
             fill_color=success_color,
@@ -68,10 +72,11 @@ def create_yemeni_coffee_success_map_with_predictions(
 # Assuming you have the model's predictions stored in a dataframe with lat, lon, and predicted_success_prob columns
 # Example: model_predictions = pd.DataFrame(...)
 
-# Call the function with necessary data (Make sure to load the model predictions properly)
-create_yemeni_coffee_success_map_with_predictions(
-    neighborhood_data=pd.read_csv("C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/final_scored_data.csv"),
-    known_shop_locations=pd.read_csv("C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/yemeniCoffeeShopsWithSuccess.csv"),
-    model_predictions=pd.read_csv("C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/final_scored_with_predictions.csv."),  # Assuming this file contains lat, lon, and predicted_success_prob
-    output_path="C:/Users/Owner/Desktop/code/cafe-compass/yemeni_coffee_success_map_with_predictions.html"
-)
+if __name__ == "__main__":
+    # Call the function with necessary data (Make sure to load the model predictions properly)
+    create_yemeni_coffee_success_map_with_predictions(
+        neighborhood_data=pd.read_csv("C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/final_scored_data.csv"),
+        known_shop_locations=pd.read_csv("C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/yemeniCoffeeShopsWithSuccess.csv", usecols=['name', 'lat', 'lon']),
+        model_predictions=pd.read_csv("C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/final_scored_with_predictions.csv."),  # Assuming this file contains lat, lon, and predicted_success_prob
+        output_path="C:/Users/Owner/Desktop/code/cafe-compass/yemeni_coffee_success_map_with_predictions.html"
+    )
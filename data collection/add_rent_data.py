@@ -1,41 +1,8 @@
+import os
 import pandas as pd
-import requests
-import geopandas as gpd
-
-
-def build_county_mapping(shapefile_path):
-    county_map = {
-        '5': '163', '8005': '163', '8010': '163',
-        '5120': '115',
-        '6060': '147', '6065': '147', '6070': '147', '6075': '147',
-        '6080': '147', '6085': '147', '6090': '147', '6095': '147',
-        '6100': '147', '6105': '147', '6110': '147', '6115': '147',
-        '6125': '147', '6135': '147', '6140': '147', '6145': '147',
-        '6150': '147', '6155': '147', '6160': '147', '6165': '147',
-        '7015': '093', '7020': '093', '7025': '093', '7030': '093',
-        '7035': '093', '7040': '093', '7045': '093', '7050': '093',
-        '7055': '093', '7060': '093', '7065': '093', '7070': '093',
-        '7075': '093', '7080': '093', '7085': '093', '7090': '093',
-        '7095': '093', '7100': '093',
-        '8015': '161',
-        '8020': '125'
-    }
 
-    try:
-        gdf = gpd.read_file(shapefile_path)
-        if 'BLOCKCE20' in gdf.columns:
-            auto_map = gdf.groupby('BLOCKCE20')['COUNTYFP20'].first().to_dict()
-            county_map.update({k: v for k, v in auto_map.items() if k not in county_map and pd.notna(v)})
-        if len(county_map) < 100 and 'GEOID20' in gdf.columns:
-            gdf['TRACT'] = gdf['GEOID20'].str[5:11].str.lstrip('0')
-            auto_map = gdf.groupby('TRACT')['COUNTYFP20'].first().to_dict()
-            county_map.update({k: v for k, v in auto_map.items() if k not in county_map and pd.notna(v)})
-    except Exception as e:
-        print(f"Warning: Could not read shapefile. Error: {e}")
+from geoid import add_geoid, county_geoid, read_tract_csv
 
-    return {str(k): str(v) for k, v in county_map.items() if v is not None}
-
-#county_mapping = build_county_mapping("C:/Users/Owner/Desktop/code/cafe-compass/data collection/dataFiles/tl_2024_26_tabblock20.shp")
 
 def add_county_id_to_csv(input_csv: str, output_csv: str) -> None:
     """
@@ -67,6 +34,9 @@ def add_county_id_to_csv(input_csv: str, output_csv: str) -> None:
         if unmatched > 0:
             print(f"⚠️ {unmatched} rows did not match a county ID.")
 
+        # Canonical tract key used by every later join
+        df = add_geoid(df)
+
         # Save the updated CSV
         df.to_csv(output_csv, index=False)
         print(f"✅ Saved updated CSV with county IDs to {output_csv}")
@@ -75,68 +45,94 @@ def add_county_id_to_csv(input_csv: str, output_csv: str) -> None:
         print(f"❌ Error processing county IDs: {e}")
 
 
-def add_rent_data(input_csv_path, output_csv_path):
+RENT_TABLE_PATH = "C:/Users/Owner/Desktop/code/cafe-compass/data collection/dataFiles/rent_per_sqft.csv"
+
+
+def load_rent_file(path):
     """
-    Adds average rent data (per sqft) to a CSV using county FIPS code (county_id).
-    
-    Args:
-        input_csv_path (str): Path to input CSV with a 'county_id' column (e.g., "082").
-        output_csv_path (str): Path to save the enhanced CSV.
+    Reads a local rent table (CSV or Parquet) with 'avg_rent_per_sqft' and either a tract 'GEOID'
+    or a 5-digit county FIPS 'county_fips' column.
     """
+    rent_df = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    key = 'GEOID' if 'GEOID' in rent_df.columns else 'county_fips'
+    if key not in rent_df.columns or 'avg_rent_per_sqft' not in rent_df.columns:
+        raise ValueError(f"Rent table {path} needs 'avg_rent_per_sqft' and 'GEOID' or 'county_fips'")
+    rent_df = rent_df[[key, 'avg_rent_per_sqft']].dropna(subset=[key])
+    rent_df[key] = rent_df[key].astype('int64')
+    return rent_df.drop_duplicates(subset=[key]).set_index(key)['avg_rent_per_sqft']
 
-    try:
-        # Load your dataset
-        df = pd.read_csv(input_csv_path, dtype={'county_id': str})
-        df['county_id'] = df['county_id'].str.zfill(3)
-    except Exception as e:
-        print(f"❌ Failed to load input CSV: {e}")
-        return
 
-    # USDA API URL — this should be checked if it actually provides what you need
-    USDA_API_URL = (
-        "https://api.ers.usda.gov/data/arms/surveydata"
-        "?api_key=nBB2gbkg6qGHQ0oS5aKlgdlqhhd7dSwnW3WVbQMR"
-        "&variable=RENT&year=2023&state=MI"
-    )
+# Rent providers by name; each takes a location string and returns a Series of avg_rent_per_sqft
+# indexed by tract GEOID or county FIPS (index name says which)
+RENT_SOURCES = {
+    'file': load_rent_file
+}
 
-    # Step 1: Fetch rent data from USDA API
-    try:
-        response = requests.get(USDA_API_URL)
-        response.raise_for_status()
-        rent_data = response.json()
-        
-        print("🔍 USDA API Response Keys:", rent_data.keys())
-        print("🧾 Sample Data:", rent_data.get("data", [{}])[0])
+
+def register_rent_source(name, loader):
+    RENT_SOURCES[name] = loader
 
 
-        # Check structure
-        if "data" not in rent_data:
-            print("❌ Unexpected USDA API response format.")
-            return
+_rent_cache = {}
 
-        rent_df = pd.DataFrame(rent_data["data"])
 
-        # Ensure required columns exist
-        if not {'county_code', 'value'}.issubset(rent_df.columns):
-            print("❌ USDA rent data missing required fields.")
-            return
+def load_rent_table(location=RENT_TABLE_PATH, source='file'):
+    """Loads a rent table through the named source once per process (re-read if the file changes)."""
+    version = os.path.getmtime(location) if os.path.exists(location) else None
+    cache_key = (source, location)
+    cached = _rent_cache.get(cache_key)
+    if cached is None or cached[0] != version:
+        _rent_cache[cache_key] = (version, RENT_SOURCES[source](location))
+    return _rent_cache[cache_key][1]
 
-        rent_df = rent_df[['county_code', 'value']].copy()
-        rent_df.rename(columns={'value': 'avg_rent_per_sqft'}, inplace=True)
-        rent_df['county_id'] = rent_df['county_code'].astype(str).str.zfill(3)
 
+def build_tract_county_index(df):
+    """Precomputes tract GEOID -> 5-digit county FIPS for every row of a tract DataFrame."""
+    if 'GEOID' not in df.columns:
+        df = add_geoid(df)
+    return pd.DataFrame({'GEOID': df['GEOID'].array, 'county_fips': county_geoid(df['GEOID']).array})
+
+
+def join_rent(df, rent):
+    """Attaches avg_rent_per_sqft by tract GEOID, or through the tract -> county index for county-level tables."""
+    index = build_tract_county_index(df)
+    if rent.index.name == 'GEOID':
+        values = rent.reindex(index['GEOID'].array)
+    else:
+        values = rent.reindex(index['county_fips'].array)
+    df['avg_rent_per_sqft'] = values.to_numpy()
+    return df
+
+
+def add_rent_data(input_csv_path, output_csv_path, rent_path=RENT_TABLE_PATH, source='file'):
+    """
+    Adds average rent data (per sqft) to a CSV from a local rent table, without network access.
+
+    Args:
+        input_csv_path (str): Path to input CSV with 'GEOID' (or 'Tract Code (id)' and 'county_id').
+        output_csv_path (str): Path to save the enhanced CSV.
+        rent_path (str): Location handed to the rent source (a file path for the 'file' source).
+        source (str): Name of a registered rent source.
+    """
+
+    try:
+        df = read_tract_csv(input_csv_path)
+        df = df.drop(columns=['avg_rent_per_sqft'], errors='ignore')
     except Exception as e:
-        print(f"❌ Failed to fetch USDA rent data: {e}")
+        print(f"❌ Failed to load input CSV: {e}")
         return
 
-    # Step 2: Merge rent data
     try:
-        df = pd.merge(df, rent_df[['county_id', 'avg_rent_per_sqft']], on='county_id', how='left')
+        rent = load_rent_table(rent_path, source)
     except Exception as e:
-        print(f"❌ Failed during merge operation: {e}")
+        print(f"❌ Failed to load rent table: {e}")
         return
 
-    # Step 3: Save to output CSV
+    df = join_rent(df, rent)
+    unmatched = df['avg_rent_per_sqft'].isna().sum()
+    if unmatched > 0:
+        print(f"⚠️ {unmatched} rows have no rent data.")
+
     try:
         df.to_csv(output_csv_path, index=False)
         print(f"✅ Rent data added successfully. Output saved to {output_csv_path}")
@@ -144,12 +140,12 @@ def add_rent_data(input_csv_path, output_csv_path):
         print(f"❌ Failed to save output CSV: {e}")
 
 
-#add_county_id_to_csv(
-    #input_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv",
-    #output_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv"
-#)
+if __name__ == "__main__":
+    #add_county_id_to_csv(
+        #input_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv",
+        #output_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv"
+    #)
 
-print("County IDs added successfully.")
-# Usage
-add_rent_data("C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv", 
-              "C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv")
\ No newline at end of file
+    # Usage
+    add_rent_data("C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv",
+                  "C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv")
@@ -20,5 +20,6 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return distance
 
 # Example
-dist = haversine_distance(37.7749, -122.4194, 34.0522, -118.2437)  # SF to LA
-print(f"Distance: {dist:.2f} km")
\ No newline at end of file
+if __name__ == "__main__":
+    dist = haversine_distance(37.7749, -122.4194, 34.0522, -118.2437)  # SF to LA
+    print(f"Distance: {dist:.2f} km")
\ No newline at end of file
@@ -0,0 +1,116 @@
+import pandas as pd
+import geopandas as gpd
+
+from geoid import add_geoid, read_tract_csv
+
+SQUARE_METERS_PER_ACRE = 4046.8564224
+
+# ACS 5-year detailed-table estimates behind each demographic column
+ACS_VARIABLES = {
+    'B01002_001E': 'median_age',
+    'B19013_001E': 'median_household_income',
+    'B17001_001E': 'poverty_universe',
+    'B17001_002E': 'poverty_below',
+    'B01003_001E': 'total_population'
+}
+
+# Store columns -> column names used in completeCafeCompassData.csv
+DEMOGRAPHIC_COLUMNS = {
+    'median_age': 'Median Age',
+    'median_household_income': 'Median Household Income',
+    'percent_poverty': 'Percent People in Poverty',
+    'population_density': 'Population Density (Persons/Acre)'
+}
+
+
+def load_acs_table(path):
+    """
+    Loads one ACS CSV download (data.census.gov or the Census API) into int GEOID -> variables.
+
+    Only the variables listed in ACS_VARIABLES are kept; the descriptive second header row that
+    data.census.gov adds is skipped.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    wanted = [c for c in header if c in ACS_VARIABLES]
+    geo_column = 'GEO_ID' if 'GEO_ID' in header else 'GEOID'
+    df = pd.read_csv(path, usecols=[geo_column] + wanted, dtype=str)
+    df = df[df[geo_column].str.contains('US', na=False) | df[geo_column].str.isdigit()]
+
+    # '1400000US26163500100' -> 26163500100
+    df['GEOID'] = df[geo_column].str.split('US').str[-1].astype('int64')
+    df = df.drop(columns=[geo_column]).set_index('GEOID')
+    # Census marks suppressed estimates with negative sentinels such as -666666666
+    df = df.apply(pd.to_numeric, errors='coerce').mask(lambda v: v < 0)
+    return df.rename(columns=ACS_VARIABLES)
+
+
+def load_tiger_tracts(path):
+    """Loads TIGER/Line tract attributes (GEOID, land area, internal point) without geometries."""
+    if path.endswith('.csv'):
+        df = pd.read_csv(path, dtype=str)
+    else:
+        df = pd.DataFrame(gpd.read_file(path, ignore_geometry=True))
+    df = df.rename(columns=lambda c: c.split(',')[0])  # Handle 'GEOID,C,11'-style exported headers
+    df = df[['GEOID', 'ALAND', 'INTPTLAT', 'INTPTLON']].copy()
+    df['GEOID'] = df['GEOID'].astype('int64')
+    for column in ['ALAND', 'INTPTLAT', 'INTPTLON']:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df.set_index('GEOID')
+
+
+def build_tract_store(acs_paths, tiger_path, store_path="tractDemographics.parquet"):
+    """
+    Bulk-loads ACS tables and TIGER tract attributes into one Parquet store indexed by GEOID.
+
+    Args:
+        acs_paths: ACS CSV downloads covering the variables in ACS_VARIABLES (any split across files).
+        tiger_path: TIGER/Line tract shapefile/DBF (or CSV export) for the same state.
+        store_path: Where to write the store.
+    """
+    acs = pd.concat([load_acs_table(path) for path in acs_paths], axis=1)
+    acs = acs.loc[:, ~acs.columns.duplicated()]  # Same variable in several files -> keep one
+    store = load_tiger_tracts(tiger_path).join(acs, how='left')
+
+    acres = store['ALAND'] / SQUARE_METERS_PER_ACRE
+    store['percent_poverty'] = store['poverty_below'] / store['poverty_universe']
+    store['population_density'] = store['total_population'] / acres.where(acres > 0)
+
+    store = store.astype('float64').sort_index()
+    store.to_parquet(store_path)
+    print(f"✅ Saved {len(store)} tracts to {store_path}")
+    return store
+
+
+def load_tract_store(store_path="tractDemographics.parquet", columns=None):
+    return pd.read_parquet(store_path, columns=columns)
+
+
+def attach_demographics(df, store):
+    """
+    Fills every demographic column of a tract DataFrame with one GEOID join against the store.
+
+    Args:
+        df: Tract DataFrame with 'GEOID' (or 'Tract Code (id)' and 'county_id' to derive it).
+        store: DataFrame from build_tract_store/load_tract_store.
+    """
+    if 'GEOID' not in df.columns:
+        df = add_geoid(df)
+    values = store[list(DEMOGRAPHIC_COLUMNS)].reindex(df['GEOID'].array)
+    for store_column, column in DEMOGRAPHIC_COLUMNS.items():
+        df[column] = values[store_column].to_numpy()
+
+    unmatched = int(values.isna().all(axis=1).sum())
+    if unmatched:
+        print(f"⚠️ {unmatched} tracts had no match in the census store.")
+    return df
+
+
+if __name__ == "__main__":
+    store = build_tract_store(
+        acs_paths=["C:/Users/Owner/Desktop/code/cafe-compass/data collection/dataFiles/ACSDT5Y2023_MI_tracts.csv"],
+        tiger_path="C:/Users/Owner/Desktop/code/cafe-compass/data collection/dataFiles/tl_2024_26_tract.shp",
+        store_path="C:/Users/Owner/Desktop/code/cafe-compass/data collection/dataFiles/tractDemographics.parquet"
+    )
+    df = read_tract_csv("C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv")
+    attach_demographics(df, store).to_csv(
+        "C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv", index=False)
@@ -1,36 +1,9 @@
 import pandas as pd
 import geopandas as gpd
 
-# Function: Gets centroid from block-level CSV (your original fallback method)
-def get_tract_centroid_from_csv(tract_number, county_number):
-    try:
-        df = pd.read_csv('C:/Users/Owner/Desktop/code/cafe-compass/data collection/vertopal.com_tl_2024_26_tabblock20.csv', dtype=str)
-        match = df[(df['BLOCKCE20,C,4'] == tract_number) &
-                   (df['COUNTYFP20,C,3'] == county_number)]
-        if match.empty:
-            return None
-        lat = match.iloc[0]['INTPTLAT20,C,11']
-        lon = match.iloc[0]['INTPTLON20,C,12']
-        return f"{lat}, {lon}"
-    except Exception as e:
-        print(f"Error reading from block-level CSV: {str(e)}")
-        return None
+from geoid import STATE_FIPS, add_geoid, geoid_from_parts
 
-# Function: Gets centroid from Census 2020 Tract-Level CSV
-def get_centroid_from_census_csv(tract_number, county_code, csv_path):
-    try:
-        df = pd.read_csv(csv_path, dtype=str)
-        tract_number = tract_number.zfill(6)
-        county_code = county_code.zfill(3)
-        match = df[(df['TRACTCE'] == tract_number) & (df['COUNTYFP'] == county_code)]
-        if match.empty:
-            return None
-        lat = match.iloc[0]['LATITUDE']
-        lon = match.iloc[0]['LONGITUDE']
-        return f"{lat}, {lon}"
-    except Exception as e:
-        print(f"Error reading from census tract-level CSV: {str(e)}")
-        return None
+BLOCK_CSV_PATH = 'C:/Users/Owner/Desktop/code/cafe-compass/data collection/vertopal.com_tl_2024_26_tabblock20.csv'
 
 # Function: Build the county mapping from shapefile with manual fallback
 def build_county_mapping(shapefile_path):
@@ -65,44 +38,72 @@ def build_county_mapping(shapefile_path):
 
     return {str(k): str(v) for k, v in county_map.items() if v is not None}
 
+# Function: Loads both centroid sources once as integer-keyed "lat, lon" lookups
+def load_centroid_lookups(census_csv_path):
+    """
+    Returns {'block': Series indexed by (county FIPS, block code), 'census': Series indexed by GEOID}.
+    """
+    lookups = {'block': pd.Series(dtype=object), 'census': pd.Series(dtype=object)}
+    try:
+        block_df = pd.read_csv(BLOCK_CSV_PATH, dtype=str,
+                               usecols=['BLOCKCE20,C,4', 'COUNTYFP20,C,3', 'INTPTLAT20,C,11', 'INTPTLON20,C,12'])
+        index = pd.MultiIndex.from_arrays([block_df['COUNTYFP20,C,3'].astype(int), block_df['BLOCKCE20,C,4'].astype(int)])
+        block = pd.Series((block_df['INTPTLAT20,C,11'] + ', ' + block_df['INTPTLON20,C,12']).to_numpy(), index=index)
+        lookups['block'] = block[~block.index.duplicated()]
+    except Exception as e:
+        print(f"Error reading from block-level CSV: {str(e)}")
+    try:
+        census_df = pd.read_csv(census_csv_path, dtype=str)
+        state = census_df['STATEFP'] if 'STATEFP' in census_df.columns else STATE_FIPS
+        geoids = geoid_from_parts(state, census_df['COUNTYFP'], census_df['TRACTCE'])
+        census = pd.Series((census_df['LATITUDE'] + ', ' + census_df['LONGITUDE']).to_numpy(), index=geoids.array)
+        lookups['census'] = census[~census.index.duplicated()]
+    except Exception as e:
+        print(f"Error reading from census tract-level CSV: {str(e)}")
+    return lookups
+
 # Main function that populates the centroids
 def add_centroids_to_csv(input_csv, output_csv, census_csv_path):
     df = pd.read_csv(input_csv)
-    county_mapping = build_county_mapping("C:/Users/Owner/Desktop/code/cafe-compass/data collection/dataFiles/tl_2024_26_tabblock20.shp")
-
-    for index, row in df.iterrows():
-        tract_id = str(row['Tract Code (id)'])
-
-        if pd.notna(row.get('Center of Tract', None)):
-            continue
+    if 'Center of Tract' not in df.columns:
+        df['Center of Tract'] = None
+    df['Center of Tract'] = df['Center of Tract'].astype(object)
 
-        county_number = county_mapping.get(tract_id)
+    # Tracts without a county_id fall back to the shapefile/manual mapping, then get their GEOID
+    if 'county_id' not in df.columns:
+        df['county_id'] = None
+    if df['county_id'].isna().any():
+        county_mapping = build_county_mapping("C:/Users/Owner/Desktop/code/cafe-compass/data collection/dataFiles/tl_2024_26_tabblock20.shp")
+        mapped = pd.to_numeric(df['Tract Code (id)'].astype(str).map(county_mapping), errors='coerce')
+        df['county_id'] = pd.to_numeric(df['county_id'], errors='coerce').fillna(mapped)
+    df = add_geoid(df)
 
-        if not county_number:
-            print(f"County not found for Tract {tract_id}")
-            df.at[index, 'Center of Tract'] = None
-            continue
+    lookups = load_centroid_lookups(census_csv_path)
+    missing = df['Center of Tract'].isna()
 
-        # Try block-level centroid first
-        centroid = get_tract_centroid_from_csv(tract_id, county_number)
+    # Try block-level centroid first
+    block_keys = pd.MultiIndex.from_arrays([
+        pd.to_numeric(df.loc[missing, 'county_id'], errors='coerce').fillna(-1).astype(int),
+        df.loc[missing, 'Tract Code (id)'].astype(int)
+    ])
+    centroids = pd.Series(lookups['block'].reindex(block_keys).to_numpy(), index=df.index[missing])
 
-        # If block-level fails, fallback to census centroid
-        if centroid is None:
-            centroid = get_centroid_from_census_csv(tract_id, county_number, census_csv_path)
+    # If block-level fails, fallback to census centroid
+    census = pd.Series(lookups['census'].reindex(df.loc[missing, 'GEOID'].array).to_numpy(), index=df.index[missing])
+    centroids = centroids.fillna(census)
 
-        if centroid:
-            print(f"Tract {tract_id}: {centroid}")
-            df.at[index, 'Center of Tract'] = centroid
-        else:
-            print(f"Tract {tract_id}: Could not determine centroid")
-            df.at[index, 'Center of Tract'] = None
+    df.loc[missing, 'Center of Tract'] = centroids
+    print(f"Centroids found for {centroids.notna().sum()} of {int(missing.sum())} tracts")
+    for tract_id in df.loc[centroids[centroids.isna()].index, 'Tract Code (id)']:
+        print(f"Tract {tract_id}: Could not determine centroid")
 
     df.to_csv(output_csv, index=False)
     print(f"Saved updated data to {output_csv}")
 
 # Call with your paths
-add_centroids_to_csv(
-    input_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData2.csv",
-    output_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv",
-    census_csv_path="C:/Users/Owner/Desktop/code/cafe-compass/data collection/CenPop2020_Mean_TR26.csv"
-)
\ No newline at end of file
+if __name__ == "__main__":
+    add_centroids_to_csv(
+        input_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData2.csv",
+        output_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv",
+        census_csv_path="C:/Users/Owner/Desktop/code/cafe-compass/data collection/CenPop2020_Mean_TR26.csv"
+    )
@@ -28,7 +28,8 @@ def get_tract_centroid(tract_number, county_number):
     return lat, lon
 
 # Example usage:
-tract_number = "4018"
-county_number = "161"
-lat, lon = get_tract_centroid(tract_number, county_number)
-print(f'{lat}, {lon}')
+if __name__ == "__main__":
+    tract_number = "4018"
+    county_number = "161"
+    lat, lon = get_tract_centroid(tract_number, county_number)
+    print(f'{lat}, {lon}')
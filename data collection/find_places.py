@@ -3,11 +3,18 @@ import os
 from datetime import datetime
 from dotenv import load_dotenv
 
+from http_backend import active_mode, install
+from instrumentation import track, save_profile
+
 load_dotenv()
 google_key = os.getenv("GOOGLE_MAPS_API_KEY")
 
-if not google_key:
-    raise ValueError("GOOGLE_MAPS_API_KEY not found in environment variables")
+
+def require_google_key():
+    """Checked on first use so importing this module works without a key."""
+    # Replayed runs never reach Google, so they don't need a key
+    if not google_key and active_mode() != 'replay':
+        raise ValueError("GOOGLE_MAPS_API_KEY not found in environment variables")
 
 def call_google_api(origin, destinations, mode):
     url = "https://maps.googleapis.com/maps/api/distancematrix/json"
@@ -18,7 +25,9 @@ def call_google_api(origin, destinations, mode):
         'key': google_key
     }
 
-    response = requests.get(url, params=params)
+    with track("google.distance_matrix") as call:
+        response = requests.get(url, params=params)
+        call['bytes'] = len(response.content)
     data = response.json()
 
     durations = []
@@ -32,6 +41,7 @@ def find_nearby_places(lat, lon, place_type, radius=5000):
     """
     Use Google Places API to find nearby places of a certain type.
     """
+    require_google_key()
     url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
     params = {
         "location": f"{lat},{lon}",
@@ -40,7 +50,9 @@ def find_nearby_places(lat, lon, place_type, radius=5000):
         "key": google_key
     }
 
-    response = requests.get(url, params=params)
+    with track("google.nearby_search") as call:
+        response = requests.get(url, params=params)
+        call['bytes'] = len(response.content)
     data = response.json()
 
     places = []
@@ -102,5 +114,7 @@ def get_coffee_shops_within_distance(lat, lon, walking_time_minutes=15, driving_
     return filter_places_by_travel_time(lat, lon, coffee_shops, walking_time_minutes, driving_time_minutes)
 
 if __name__ == "__main__":
+    install()
     lat, lon = 42.3223,-83.1763
-    print(get_restaurants_within_distance(lat, lon))
\ No newline at end of file
+    print(get_restaurants_within_distance(lat, lon))
+    save_profile("find_places")
\ No newline at end of file
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+# Michigan; every tract in completeCafeCompassData.csv is in-state
+STATE_FIPS = 26
+
+
+def _numeric(values):
+    if np.isscalar(values):
+        return float(values)
+    return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+
+
+def geoid_from_parts(state_fips, county_fips, tractce):
+    """Builds Int64 GEOIDs from Census-file columns (STATEFP, COUNTYFP, 6-digit TRACTCE)."""
+    geoid = _numeric(state_fips) * 10**9 + _numeric(county_fips) * 10**6 + _numeric(tractce)
+    return pd.Series(geoid).round().astype('Int64')
+
+
+def tract_geoid(county_fips, tract_code, state_fips=STATE_FIPS):
+    """
+    Builds 11-digit tract GEOIDs (2-digit state + 3-digit county + 6-digit tract) as Int64.
+
+    Args:
+        county_fips: County FIPS numbers (ints, floats like 163.0, or strings like '163').
+        tract_code: Tract names as used in 'Tract Code (id)' (e.g. 5030 or 5030.01), i.e. the
+            6-digit TRACTCE divided by 100.
+        state_fips: State FIPS number.
+    """
+    return geoid_from_parts(state_fips, county_fips, _numeric(tract_code) * 100)
+
+
+def county_geoid(geoid):
+    """5-digit state + county FIPS of each tract GEOID."""
+    return geoid // 10**6
+
+
+def add_geoid(df, state_fips=STATE_FIPS):
+    """
+    Adds the canonical integer 'GEOID' column from 'county_id' and 'Tract Code (id)'.
+
+    Rows that already carry a GEOID keep it, so this is safe to call at every ingestion step.
+    """
+    computed = tract_geoid(df['county_id'], df['Tract Code (id)'], state_fips)
+    if 'GEOID' in df.columns:
+        existing = pd.Series(pd.array(df['GEOID'], dtype='Int64'))
+        df['GEOID'] = existing.fillna(computed).array
+    else:
+        df['GEOID'] = computed.array
+
+    missing = int(df['GEOID'].isna().sum())
+    if missing:
+        print(f"⚠️ {missing} tracts have no GEOID (missing county_id).")
+    return df
+
+
+def read_tract_csv(path, **kwargs):
+    """Reads a tract CSV and guarantees its integer 'GEOID' column."""
+    df = pd.read_csv(path, **kwargs)
+    if 'GEOID' in df.columns:
+        df['GEOID'] = pd.array(df['GEOID'], dtype='Int64')
+    if 'county_id' in df.columns and 'Tract Code (id)' in df.columns:
+        df = add_geoid(df)
+    return df
@@ -0,0 +1,171 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# live: normal network access; record: network + save every response; replay: cassette only;
+# auto: replay what is recorded and record the rest
+HTTP_MODES = ('live', 'record', 'replay', 'auto')
+HTTP_MODE_ENV = "CAFE_COMPASS_HTTP_MODE"
+CASSETTE_ENV = "CAFE_COMPASS_CASSETTE"
+DEFAULT_CASSETTE_PATH = "cassettes/cafe_compass.jsonl"
+
+# Credentials never end up in a cassette key or file
+SECRET_PARAMS = {'key', 'api_key', 'apikey', 'client', 'signature'}
+
+# Headers that describe the wire format of the original body, not the decoded content we store
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Raised in replay mode for a request that was never recorded (behaves like being offline)."""
+
+
+def sanitize_url(url):
+    """Drops credential query parameters and sorts the rest so equivalent URLs match."""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+
+
+def request_key(method, url, body=None):
+    """Cassette key: method, sanitized URL and a hash of the request body."""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    body_hash = hashlib.sha1(body).hexdigest()[:16] if body else ''
+    return f"{method.upper()} {sanitize_url(url)} {body_hash}"
+
+
+class Cassette:
+    """
+    Recorded responses in a JSONL file, loaded into an in-memory dict keyed by request_key().
+
+    New recordings are appended as they happen, so an interrupted run keeps what it fetched.
+    """
+
+    def __init__(self, path=DEFAULT_CASSETTE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['key']] = entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def record(self, key, request, response):
+        entry = {
+            'key': key,
+            'method': request.method,
+            'url': sanitize_url(request.url),
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS},
+            'encoding': response.encoding,
+            'body': base64.b64encode(response.content).decode('ascii')
+        }
+        with self.lock:
+            self.entries[key] = entry
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def build_response(entry, request):
+    """Rebuilds a requests.Response from a cassette entry."""
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.reason = entry['reason']
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response.encoding = entry['encoding']
+    response._content = base64.b64decode(entry['body'])
+    response.url = request.url
+    response.request = request
+    return response
+
+
+_original_send = HTTPAdapter.send
+_active = {'mode': 'live', 'cassette': None}
+
+
+def _send(adapter, request, **kwargs):
+    mode, cassette = _active['mode'], _active['cassette']
+    key = request_key(request.method, request.url, request.body)
+
+    if mode in ('replay', 'auto'):
+        entry = cassette.get(key)
+        if entry is not None:
+            return build_response(entry, request)
+        if mode == 'replay':
+            raise CassetteMiss(f"No recorded response for {key}", request=request)
+
+    response = _original_send(adapter, request, **kwargs)
+    cassette.record(key, request, response)
+    return response
+
+
+def install(mode=None, cassette_path=None):
+    """
+    Routes every requests-based call (requests.get, googlemaps, pytrends, geopy, osmnx) through
+    the cassette store.
+
+    Args:
+        mode: One of HTTP_MODES; defaults to $CAFE_COMPASS_HTTP_MODE, then 'live'.
+        cassette_path: Cassette file; defaults to $CAFE_COMPASS_CASSETTE, then DEFAULT_CASSETTE_PATH.
+
+    Returns:
+        The loaded Cassette, or None in live mode.
+    """
+    mode = (mode or os.getenv(HTTP_MODE_ENV) or 'live').lower()
+    if mode not in HTTP_MODES:
+        raise ValueError(f"Unknown HTTP mode {mode!r}; expected one of {HTTP_MODES}")
+
+    if mode == 'live':
+        uninstall()
+        return None
+
+    cassette = Cassette(cassette_path or os.getenv(CASSETTE_ENV) or DEFAULT_CASSETTE_PATH)
+    _active['mode'], _active['cassette'] = mode, cassette
+    HTTPAdapter.send = _send
+    print(f"🎞️ HTTP {mode} mode using {cassette.path} ({len(cassette)} recorded responses)")
+    return cassette
+
+
+def active_mode():
+    """HTTP mode requests are currently routed through (set by install())."""
+    return _active['mode']
+
+
+def uninstall():
+    HTTPAdapter.send = _original_send
+    _active['mode'], _active['cassette'] = 'live', None
+
+
+@contextmanager
+def use_cassette(cassette_path, mode='replay'):
+    """Temporarily records to or replays from cassette_path."""
+    previous = dict(_active)
+    cassette = install(mode, cassette_path)
+    try:
+        yield cassette
+    finally:
+        if previous['mode'] == 'live':
+            uninstall()
+        else:
+            _active.update(previous)
@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# Upper edges (ms) of the latency histogram buckets; the last bucket catches everything slower
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+PROFILE_DIR = os.getenv("CAFE_COMPASS_PROFILE_DIR", "profiles")
+
+
+def _empty_stats():
+    return {
+        'calls': 0,
+        'errors': 0,
+        'seconds': 0.0,
+        'bytes': 0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'latencies_ms': []
+    }
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Profiler:
+    """
+    Thread-safe per-run record of external calls: latency, call/error counts, bytes and cache hits.
+
+    Call sites are named "<service>.<endpoint>" (e.g. "google.place_details") so the report can be
+    rolled up per service to estimate quota use.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.stats = {}
+
+    def _entry(self, name):
+        if name not in self.stats:
+            self.stats[name] = _empty_stats()
+        return self.stats[name]
+
+    def record(self, name, seconds, nbytes=0, error=False):
+        with self.lock:
+            entry = self._entry(name)
+            entry['calls'] += 1
+            entry['errors'] += int(error)
+            entry['seconds'] += seconds
+            entry['bytes'] += nbytes or 0
+            entry['latencies_ms'].append(seconds * 1000)
+
+    def cache_hit(self, name, count=1):
+        with self.lock:
+            self._entry(name)['cache_hits'] += count
+
+    def cache_miss(self, name, count=1):
+        with self.lock:
+            self._entry(name)['cache_misses'] += count
+
+    @contextmanager
+    def track(self, name):
+        """
+        Times the enclosed external call. Set call['bytes'] inside the block to record the payload size.
+
+        Example:
+            with PROFILER.track("overpass.interpreter") as call:
+                response = requests.get(url, params=params)
+                call['bytes'] = len(response.content)
+        """
+        call = {'bytes': 0}
+        start = time.perf_counter()
+        try:
+            yield call
+        except BaseException:
+            self.record(name, time.perf_counter() - start, call['bytes'], error=True)
+            raise
+        self.record(name, time.perf_counter() - start, call['bytes'])
+
+    def instrument(self, name, size=None):
+        """Decorator form of track(); size(result) may return the bytes a call transferred."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.track(name) as call:
+                    result = func(*args, **kwargs)
+                    if size is not None:
+                        call['bytes'] = size(result)
+                return result
+            return wrapper
+        return decorator
+
+    def report(self):
+        """Summary dict: per call site, per service and the run's wall time."""
+        with self.lock:
+            stats = {name: dict(entry, latencies_ms=list(entry['latencies_ms'])) for name, entry in self.stats.items()}
+
+        calls = {}
+        services = {}
+        for name, entry in sorted(stats.items()):
+            latencies = sorted(entry.pop('latencies_ms'))
+            histogram = {f"<={edge}ms": 0 for edge in LATENCY_BUCKETS_MS}
+            histogram[f">{LATENCY_BUCKETS_MS[-1]}ms"] = 0
+            for ms in latencies:
+                edge = next((edge for edge in LATENCY_BUCKETS_MS if ms <= edge), None)
+                histogram[f"<={edge}ms" if edge is not None else f">{LATENCY_BUCKETS_MS[-1]}ms"] += 1
+
+            lookups = entry['cache_hits'] + entry['cache_misses']
+            calls[name] = {
+                **entry,
+                'seconds': round(entry['seconds'], 6),
+                'cache_hit_rate': round(entry['cache_hits'] / lookups, 4) if lookups else None,
+                'latency_ms': {
+                    'p50': _percentile(latencies, 0.5),
+                    'p95': _percentile(latencies, 0.95),
+                    'max': latencies[-1] if latencies else None
+                },
+                'histogram': histogram
+            }
+
+            service = services.setdefault(name.split('.')[0], {'calls': 0, 'errors': 0, 'seconds': 0.0, 'bytes': 0})
+            for key in service:
+                service[key] += entry[key]
+
+        for service in services.values():
+            service['seconds'] = round(service['seconds'], 6)
+
+        wall_seconds = time.time() - self.started_at
+        network_seconds = sum(entry['seconds'] for entry in calls.values())
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at).isoformat(),
+            'wall_seconds': round(wall_seconds, 3),
+            'network_seconds': round(network_seconds, 3),
+            'services': services,
+            'calls': calls
+        }
+
+    def reset(self):
+        with self.lock:
+            self.started_at = time.time()
+            self.stats = {}
+
+
+# Shared profiler every collection script records into
+PROFILER = Profiler()
+track = PROFILER.track
+instrument = PROFILER.instrument
+
+
+def save_profile(run_name, profile_dir=PROFILE_DIR, profiler=PROFILER):
+    """Writes the run's profile report to <profile_dir>/<run_name>-<timestamp>.json and prints a summary."""
+    report = profiler.report()
+    report['run'] = run_name
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"{run_name}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"📊 {run_name}: {report['network_seconds']}s of {report['wall_seconds']}s spent in external calls")
+    for name, entry in report['calls'].items():
+        hit_rate = f", cache hit rate {entry['cache_hit_rate']:.0%}" if entry['cache_hit_rate'] is not None else ""
+        print(f"   {name}: {entry['calls']} calls, {entry['errors']} errors, {entry['bytes']} bytes{hit_rate}")
+    print(f"✅ Profile saved to {path}")
+    return path
@@ -0,0 +1,256 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import shapely
+from scipy import sparse
+from scipy.sparse.csgraph import dijkstra
+from sklearn.neighbors import BallTree
+
+from parallel_tracts import map_tracts
+
+# Southeast Michigan (west, south, east, north), covering every tract in completeCafeCompassData.csv
+DEFAULT_BBOX = (-84.2, 41.7, -82.3, 43.2)
+GRAPH_CACHE_DIR = "osmGraphs"
+
+WALK_SPEED_KPH = 4.8
+DRIVE_MINUTES = 10
+WALK_MINUTES = 15
+
+# Snapping a tract centroid to a single node can land on a one-way stub, so Dijkstra starts
+# from the few nearest nodes at once
+SOURCE_NODES = 3
+
+# Concave hull tightness (1 = convex hull, smaller hugs the reachable nodes more closely)
+HULL_RATIO = 0.3
+
+# POI type -> tract column it fills (same place types the Nearby Search step used)
+PLACE_COLUMNS = {
+    'mosque': '# of Nearby Mosques',
+    'restaurant': '# of Nearby Restaurants',
+    'cafe': '# of Nearby Coffee Shops'
+}
+
+# OSM tags for each POI type
+POI_TAGS = {
+    'restaurant': {'amenity': 'restaurant'},
+    'cafe': {'amenity': 'cafe'},
+    'mosque': {'amenity': 'place_of_worship', 'religion': 'muslim'}
+}
+
+
+class TravelGraph:
+    """Street network compiled for routing: CSR travel-time matrix plus a node index for snapping."""
+
+    def __init__(self, csr, node_lat, node_lon):
+        self.csr = csr
+        self.node_lat = node_lat
+        self.node_lon = node_lon
+        self.tree = BallTree(np.radians(np.column_stack([node_lat, node_lon])), metric='haversine')
+
+    @classmethod
+    def from_networkx(cls, G, weight='travel_time'):
+        """Builds the CSR matrix from an osmnx graph, keeping the fastest of any parallel edges."""
+        nodes = list(G.nodes)
+        position = {node: i for i, node in enumerate(nodes)}
+        rows, cols, seconds = [], [], []
+        for u, v, data in G.edges(data=True):
+            rows.append(position[u])
+            cols.append(position[v])
+            seconds.append(data[weight])
+
+        # Duplicate entries would be summed by the COO -> CSR conversion, so keep the minimum first
+        edges = pd.DataFrame({'u': rows, 'v': cols, 't': seconds}).groupby(['u', 'v'], as_index=False)['t'].min()
+        csr = sparse.csr_matrix((edges['t'].to_numpy(dtype=float), (edges['u'], edges['v'])),
+                                shape=(len(nodes), len(nodes)))
+
+        node_lat = np.array([G.nodes[node]['y'] for node in nodes])
+        node_lon = np.array([G.nodes[node]['x'] for node in nodes])
+        return cls(csr, node_lat, node_lon)
+
+    def nearest_nodes(self, lat, lon, k=SOURCE_NODES):
+        _, idx = self.tree.query(np.radians([[lat, lon]]), k=min(k, len(self.node_lat)))
+        return idx[0]
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+
+def download_network(network_type, bbox=DEFAULT_BBOX):
+    """Downloads the OSM drive or walk network with a travel_time (seconds) on every edge."""
+    import osmnx as ox
+
+    G = ox.graph_from_bbox(bbox, network_type=network_type)
+    if network_type == 'drive':
+        G = ox.add_edge_speeds(G)
+        G = ox.add_edge_travel_times(G)
+    else:
+        meters_per_second = WALK_SPEED_KPH * 1000 / 3600
+        for _, _, data in G.edges(data=True):
+            data['travel_time'] = data['length'] / meters_per_second
+    return G
+
+
+def load_travel_graph(network_type, bbox=DEFAULT_BBOX, cache_dir=GRAPH_CACHE_DIR):
+    """
+    Returns the compiled TravelGraph for 'drive' or 'walk', downloading it from OSM only once.
+
+    Both the raw GraphML and the compiled CSR graph are cached in cache_dir.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    name = f"{network_type}_{'_'.join(str(c) for c in bbox)}"
+    compiled_path = os.path.join(cache_dir, f"{name}.joblib")
+    if os.path.exists(compiled_path):
+        return TravelGraph.load(compiled_path)
+
+    import osmnx as ox
+
+    graphml_path = os.path.join(cache_dir, f"{name}.graphml")
+    if os.path.exists(graphml_path):
+        G = ox.load_graphml(graphml_path)
+    else:
+        print(f"Downloading OSM {network_type} network...")
+        G = download_network(network_type, bbox)
+        ox.save_graphml(G, graphml_path)
+
+    graph = TravelGraph.from_networkx(G)
+    graph.save(compiled_path)
+    return graph
+
+
+def download_pois(bbox=DEFAULT_BBOX, output_csv="osmPois.csv"):
+    """Fetches restaurants, cafes and mosques from OSM into a (type, lat, lon) POI table."""
+    import osmnx as ox
+
+    frames = []
+    for place_type, tags in POI_TAGS.items():
+        features = ox.features_from_bbox(bbox, {key: value for key, value in tags.items() if key == 'amenity'})
+        for key, value in tags.items():
+            if key != 'amenity' and key in features.columns:
+                features = features[features[key] == value]
+        points = features.geometry.representative_point()
+        frames.append(pd.DataFrame({'type': place_type, 'lat': points.y.to_numpy(), 'lon': points.x.to_numpy()}))
+
+    pois = pd.concat(frames, ignore_index=True)
+    pois.to_csv(output_csv, index=False)
+    print(f"✅ Saved {len(pois)} POIs to {output_csv}")
+    return pois
+
+
+def build_poi_index(pois):
+    """POI table -> {type: (lon array, lat array)} sorted by longitude for fast bounding-box cuts."""
+    index = {}
+    for place_type in PLACE_COLUMNS:
+        subset = pois[pois['type'] == place_type].sort_values('lon')
+        index[place_type] = (subset['lon'].to_numpy(dtype=float), subset['lat'].to_numpy(dtype=float))
+    return index
+
+
+def isochrone(graph, lat, lon, seconds):
+    """
+    Reachable-area polygon within `seconds` of (lat, lon).
+
+    Runs one multi-source Dijkstra from the nearest network nodes, stopping at the time limit,
+    and wraps the reachable nodes in a concave hull.
+    """
+    sources = graph.nearest_nodes(lat, lon)
+    times = dijkstra(graph.csr, directed=True, indices=sources, limit=seconds, min_only=True)
+    reachable = np.isfinite(times)
+    points = shapely.multipoints(np.column_stack([graph.node_lon[reachable], graph.node_lat[reachable]]))
+    return shapely.concave_hull(points, ratio=HULL_RATIO)
+
+
+def count_pois_in(polygon, poi_index):
+    """Point-in-polygon counts per POI type."""
+    counts = {}
+    min_lon, min_lat, max_lon, max_lat = polygon.bounds
+    shapely.prepare(polygon)
+    for place_type, (lons, lats) in poi_index.items():
+        start = np.searchsorted(lons, min_lon, side='left')
+        stop = np.searchsorted(lons, max_lon, side='right')
+        lon_cut, lat_cut = lons[start:stop], lats[start:stop]
+        in_box = (lat_cut >= min_lat) & (lat_cut <= max_lat)
+        counts[place_type] = int(shapely.contains_xy(polygon, lon_cut[in_box], lat_cut[in_box]).sum())
+    return counts
+
+
+def tract_reachable_counts(row, shared):
+    """map_tracts worker: drive/walk isochrones of one tract and the POIs inside them."""
+    if pd.isna(row['lat']) or pd.isna(row['lon']):
+        return None
+    result = {}
+    for mode in ('drive', 'walk'):
+        graph = shared.get(mode)
+        if graph is None:
+            continue
+        polygon = isochrone(graph, row['lat'], row['lon'], shared[f'{mode}_seconds'])
+        result[mode] = count_pois_in(polygon, shared['pois'])
+        result[f'{mode}_polygon'] = shapely.to_wkt(polygon, rounding_precision=5)
+    return result
+
+
+def add_isochrone_place_counts(input_csv, output_csv, pois_csv, drive_minutes=DRIVE_MINUTES,
+                               walk_minutes=WALK_MINUTES, bbox=DEFAULT_BBOX, cache_dir=GRAPH_CACHE_DIR,
+                               polygons_csv=None, max_workers=None):
+    """
+    Fills the nearby mosque/restaurant/coffee shop counts from local drive-time isochrones.
+
+    Replaces the Nearby Search + Distance Matrix filtering in placeData_to_csv.py: the drivable
+    counts go into the existing '# of Nearby ...' columns (as before) and walkable counts into
+    'walkable_<type>' columns. No Google API calls are made.
+
+    Args:
+        input_csv: Tract CSV with lat/lon columns.
+        output_csv: Where to write the updated tracts.
+        pois_csv: POI table with type, lat, lon (see download_pois).
+        drive_minutes / walk_minutes: Isochrone time limits.
+        polygons_csv: Optionally save each tract's isochrone polygons as WKT.
+        max_workers: Processes used (default: one per core).
+    """
+    df = pd.read_csv(input_csv)
+    shared = {
+        'drive': load_travel_graph('drive', bbox, cache_dir),
+        'walk': load_travel_graph('walk', bbox, cache_dir) if walk_minutes else None,
+        'drive_seconds': drive_minutes * 60,
+        'walk_seconds': (walk_minutes or 0) * 60,
+        'pois': build_poi_index(pd.read_csv(pois_csv))
+    }
+
+    results = map_tracts(tract_reachable_counts, df, shared=shared, columns=['lat', 'lon'],
+                         max_workers=max_workers, desc="Isochrones")
+
+    for place_type, column in PLACE_COLUMNS.items():
+        df[column] = [r['drive'][place_type] if r else np.nan for r in results]
+        if walk_minutes:
+            df[f'walkable_{place_type}'] = [r['walk'][place_type] if r else np.nan for r in results]
+
+    df.to_csv(output_csv, index=False)
+    print(f"✅ Updated data saved to {output_csv}")
+
+    if polygons_csv:
+        key = 'GEOID' if 'GEOID' in df.columns else 'Tract Code (id)'
+        polygons = pd.DataFrame({
+            key: df[key],
+            'drive_polygon': [r['drive_polygon'] if r else None for r in results],
+            'walk_polygon': [r.get('walk_polygon') if r else None for r in results]
+        })
+        polygons.to_csv(polygons_csv, index=False)
+        print(f"✅ Isochrone polygons saved to {polygons_csv}")
+
+    return df
+
+
+if __name__ == "__main__":
+    pois_path = "C:/Users/Owner/Desktop/code/cafe-compass/data collection/osmPois.csv"
+    if not os.path.exists(pois_path):
+        download_pois(output_csv=pois_path)
+    add_isochrone_place_counts(
+        "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/completeCafeCompassData.csv",
+        "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/completeCafeCompassData.csv",
+        pois_path,
+        polygons_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/isochrones.csv"
+    )
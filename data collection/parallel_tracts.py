@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+# Read-only reference data handed to every worker once, at pool start-up.
+# On fork it is inherited from the parent; on spawn (Windows) it is pickled once per worker
+# instead of once per task.
+_shared = None
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+
+def _run_chunk(func, records):
+    return [func(record, _shared) for record in records]
+
+
+def _chunk(records, chunk_size):
+    return [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+
+
+def map_tracts(func, df, shared=None, columns=None, chunk_size=None, max_workers=None,
+               desc="Tracts", show_progress=True):
+    """
+    Applies func(row, shared) to every row of a tract DataFrame across a process pool.
+
+    Args:
+        func: Module-level function taking (row dict, shared) and returning one result per row.
+        df: Tract DataFrame to iterate over.
+        shared: Read-only reference data (lookup tables, config) sent to each worker once.
+        columns: Only ship these columns to the workers (default: all).
+        chunk_size: Rows per task (default: spread rows evenly, ~4 tasks per worker).
+        max_workers: Worker processes (default: os.cpu_count()). 1 runs in-process.
+        desc: Progress bar label.
+        show_progress: Show a tqdm progress bar.
+
+    Returns:
+        A list of results in the same order as the rows of df.
+    """
+    frame = df[columns] if columns is not None else df
+    records = frame.to_dict('records')
+    if not records:
+        return []
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, len(records) // (max_workers * 4))
+
+    progress = tqdm(total=len(records), desc=desc, unit="tract", disable=not show_progress)
+
+    if max_workers == 1:
+        results = []
+        for record in records:
+            results.append(func(record, shared))
+            progress.update(1)
+        progress.close()
+        return results
+
+    chunks = _chunk(records, chunk_size)
+    chunk_results = [None] * len(chunks)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(shared,)) as executor:
+        futures = {executor.submit(_run_chunk, func, chunk): i for i, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            i = futures[future]
+            chunk_results[i] = future.result()
+            progress.update(len(chunks[i]))
+
+    progress.close()
+    return [result for chunk in chunk_results for result in chunk]
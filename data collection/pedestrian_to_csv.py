@@ -5,6 +5,10 @@ import requests
 import osmnx as ox
 import time
 
+from http_backend import install
+from instrumentation import track, save_profile
+from parallel_tracts import map_tracts
+
 
 def parse_lat_lon(coord):
     try:
@@ -17,7 +21,20 @@ def parse_lat_lon(coord):
         print(f"Failed to parse coordinate: {coord} – {e}")
         return None, None
 
-def add_mobility_features(input_csv: str, output_csv: str, radius_meters: int = 1609) -> None:
+def pedestrian_score(row, shared=None):
+    """Walkability (walk-network nodes within 500m) blended with nearby business density."""
+    try:
+        G = ox.graph_from_point((row['lat'], row['lon']), dist=500, network_type='walk')
+        walkability = len(G.nodes) / 100  # Normalized
+
+        business_density = (row['# of Nearby Restaurants'] + row['# of Nearby Coffee Shops']) / 10  # Normalized
+
+        return 0.6 * walkability + 0.4 * business_density
+    except Exception as e:
+        print(f"Error for tract {row.get('Tract Code (id)', 'unknown')}: {e}")
+        return None
+
+def add_mobility_features(input_csv: str, output_csv: str, radius_meters: int = 1609, max_workers: int = None) -> None:
     """
     Enhances a tract-level CSV with mobility features:
     - Number of transit stops within a radius.
@@ -27,6 +44,7 @@ def add_mobility_features(input_csv: str, output_csv: str, radius_meters: int =
         input_csv: Path to input CSV with columns: ['id', 'lat', 'lon', ...].
         output_csv: Path to save the enhanced CSV.
         radius_meters: Search radius for transit stops (default: 1609m ~ 1 mile).
+        max_workers: Processes used for pedestrian scores (default: one per core).
     """
     df = pd.read_csv(input_csv)
     df[['lat', 'lon']] = df['Center of Tract'].apply(parse_lat_lon).apply(pd.Series)
@@ -51,7 +69,9 @@ def add_mobility_features(input_csv: str, output_csv: str, radius_meters: int =
 );
 out count;
 """
-            response = requests.get("https://overpass-api.de/api/interpreter", params={"data": query})
+            with track("overpass.interpreter") as call:
+                response = requests.get("https://overpass-api.de/api/interpreter", params={"data": query})
+                call['bytes'] = len(response.content)
 
             if response.status_code != 200:
                 print(f"Bad response ({response.status_code}): {response.text}")
@@ -68,22 +88,21 @@ out count;
 
     # --- 2. Calculate Pedestrian Score ---
     print("Calculating pedestrian scores...")
-    for idx, row in tqdm(gdf.iterrows(), total=gdf.shape[0], desc="Pedestrian Score", unit="tract"):
-        try:
-            G = ox.graph_from_point((row['lat'], row['lon']), dist=500, network_type='walk')
-            walkability = len(G.nodes) / 100  # Normalized
-
-            business_density = (row['# of Nearby Restaurants'] + row['# of Nearby Coffee Shops']) / 10  # Normalized
-
-            gdf.at[idx, 'pedestrian_score'] = 0.6 * walkability + 0.4 * business_density
-        except Exception as e:
-            print(f"Error for tract {row.get('Tract Code (id)', 'unknown')}: {e}")
-            gdf.at[idx, 'pedestrian_score'] = None
+    gdf['pedestrian_score'] = map_tracts(
+        pedestrian_score,
+        gdf,
+        columns=['Tract Code (id)', 'lat', 'lon', '# of Nearby Restaurants', '# of Nearby Coffee Shops'],
+        max_workers=max_workers,
+        desc="Pedestrian Score"
+    )
 
     gdf.drop(columns=['geometry']).to_csv(output_csv, index=False)
     print(f"Saved enhanced data to {output_csv}")
 
 
-# Example Usage
-add_mobility_features("C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv", 
-                      "C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv")
\ No newline at end of file
+# Example Usage (guarded so pedestrian-score workers can re-import this module)
+if __name__ == "__main__":
+    install()
+    add_mobility_features("C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv", 
+                          "C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv")
+    save_profile("pedestrian_to_csv")
\ No newline at end of file
@@ -5,12 +5,19 @@ import requests
 import os
 from dotenv import load_dotenv
 
+from http_backend import active_mode, install
+from instrumentation import track, save_profile
+
 # Load environment variables
 load_dotenv()
 google_key = os.getenv("GOOGLE_MAPS_API_KEY")
 
-if not google_key:
-    raise ValueError("GOOGLE_MAPS_API_KEY not found in environment variables")
+
+def require_google_key():
+    """Checked on first use so importing this module works without a key."""
+    # Replayed runs never reach Google, so they don't need a key
+    if not google_key and active_mode() != 'replay':
+        raise ValueError("GOOGLE_MAPS_API_KEY not found in environment variables")
 
 # API call functions (provided in your code)
 def call_google_api(origin, destinations, mode):
@@ -22,7 +29,9 @@ def call_google_api(origin, destinations, mode):
         'key': google_key
     }
 
-    response = requests.get(url, params=params)
+    with track("google.distance_matrix") as call:
+        response = requests.get(url, params=params)
+        call['bytes'] = len(response.content)
     data = response.json()
 
     durations = []
@@ -35,6 +44,7 @@ def find_nearby_places(lat, lon, place_type, radius=5000):
     """
     Use Google Places API to find nearby places of a certain type.
     """
+    require_google_key()
     url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
     params = {
         "location": f"{lat},{lon}",
@@ -43,7 +53,9 @@ def find_nearby_places(lat, lon, place_type, radius=5000):
         "key": google_key
     }
 
-    response = requests.get(url, params=params)
+    with track("google.nearby_search") as call:
+        response = requests.get(url, params=params)
+        call['bytes'] = len(response.content)
     data = response.json()
 
     places = []
@@ -100,6 +112,9 @@ def get_coffee_shops_within_distance(lat, lon, walking_time_minutes=15, driving_
     return filter_places_by_travel_time(lat, lon, coffee_shops, walking_time_minutes, driving_time_minutes)
 
 def update_nearby_places_counts(input_csv, output_csv):
+    # Fail before the per-tract error handling would turn a missing key into zero counts
+    require_google_key()
+
     # Read the CSV file
     df = pd.read_csv(input_csv)
     
@@ -158,7 +173,9 @@ def update_nearby_places_counts(input_csv, output_csv):
     print(f"Updated data saved to {output_csv}")
 
 
-#print(updated_csv)
-input_csv = "C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv"  # Use the file with centroids
-output_csv = "C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv"
-update_nearby_places_counts(input_csv, output_csv)
\ No newline at end of file
+if __name__ == "__main__":
+    install()
+    input_csv = "C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv"  # Use the file with centroids
+    output_csv = "C:/Users/Owner/Desktop/code/cafe-compass/data collection/completeCafeCompassData.csv"
+    update_nearby_places_counts(input_csv, output_csv)
+    save_profile("placeData_to_csv")
\ No newline at end of file
@@ -0,0 +1,100 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from success_labeling import parse_list_cell
+
+# The only review fields labeling uses; author/profile URLs and translations are dropped
+REVIEW_COLUMNS = ['place_id', 'text', 'rating', 'time']
+
+
+def shop_key(name, lat, lon):
+    """Stable stand-in for place_id on shops collected before place_ids were stored."""
+    raw = f"{name}|{float(lat):.6f}|{float(lon):.6f}"
+    return "local:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def ensure_place_ids(df):
+    """Adds or fills the 'place_id' column so every shop can be joined to its reviews."""
+    if 'place_id' not in df.columns:
+        df.insert(0, 'place_id', None)
+    missing = df['place_id'].isna()
+    if missing.any():
+        df.loc[missing, 'place_id'] = [
+            shop_key(name, lat, lon)
+            for name, lat, lon in zip(df.loc[missing, 'name'], df.loc[missing, 'lat'], df.loc[missing, 'lon'])
+        ]
+    return df
+
+
+def split_reviews(df):
+    """
+    Splits embedded review lists out of a shop table.
+
+    Returns:
+        (shop DataFrame without the 'reviews' column, review DataFrame with REVIEW_COLUMNS)
+    """
+    df = ensure_place_ids(df.copy())
+    rows = []
+    if 'reviews' in df.columns:
+        for place_id, value in zip(df['place_id'], df['reviews']):
+            for review in parse_list_cell(value):
+                if isinstance(review, dict):
+                    rows.append((place_id, review.get('text', '') or '', review.get('rating'), review.get('time')))
+        df = df.drop(columns=['reviews'])
+
+    reviews = pd.DataFrame(rows, columns=REVIEW_COLUMNS)
+    reviews['rating'] = pd.to_numeric(reviews['rating'], errors='coerce').astype('Int8')
+    reviews['time'] = pd.to_numeric(reviews['time'], errors='coerce').astype('Int64')
+    return df, reviews
+
+
+def load_review_table(path):
+    """Loads a review table written by save_review_table (Parquet or CSV by extension)."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=REVIEW_COLUMNS)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=REVIEW_COLUMNS)
+    return pd.read_csv(path, usecols=REVIEW_COLUMNS, dtype={'place_id': str, 'text': str})
+
+
+def save_review_table(reviews, path):
+    """Merges reviews into the table at path, keeping one row per (place_id, time, text)."""
+    existing = load_review_table(path)
+    combined = pd.concat([existing, reviews], ignore_index=True) if len(existing) else reviews
+    combined = combined.drop_duplicates(subset=['place_id', 'time', 'text'], keep='last')
+    combined = combined.sort_values(['place_id', 'time'], kind='stable').reset_index(drop=True)
+    if path.endswith('.parquet'):
+        combined.to_parquet(path, index=False)
+    else:
+        combined.to_csv(path, index=False)
+    return combined
+
+
+def load_shops(path, columns=None):
+    """
+    Loads a shop table without touching review text.
+
+    Args:
+        path: Shop CSV (lean, or a legacy file that still embeds 'reviews').
+        columns: Only load these columns (default: every column except 'reviews').
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in (columns or header) if c != 'reviews' and c in header]
+    return pd.read_csv(path, usecols=usecols)[usecols]
+
+
+def migrate_embedded_reviews(shops_csv, reviews_path):
+    """Moves the 'reviews' column of a legacy shop CSV into the review table, rewriting the CSV lean."""
+    shops, reviews = split_reviews(pd.read_csv(shops_csv))
+    save_review_table(reviews, reviews_path)
+    shops.to_csv(shops_csv, index=False)
+    print(f"✅ Moved {len(reviews)} reviews from {shops_csv} to {reviews_path}")
+    return shops
+
+
+if __name__ == "__main__":
+    for shops_csv in ["C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/yemeniCoffeeShops.csv",
+                      "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/yemeniCoffeeShopsWithSuccess.csv"]:
+        migrate_embedded_reviews(shops_csv, "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/yemeniCoffeeShopReviews.csv")
@@ -0,0 +1,196 @@
+import ast
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+# Thresholds used to label a Yemeni coffee shop as successful.
+# Each criterion met adds one point; shops scoring at least min_score are successful.
+DEFAULT_SUCCESS_RULES = {
+    'min_rating': 4.0,                   # rating >= min_rating
+    'min_user_ratings_total': 100,       # user_ratings_total > min_user_ratings_total
+    'price_levels': [2, 3],              # balanced price range
+    'positive_keywords': ['good', 'excellent', 'great', 'awesome'],
+    'min_keyword_hits': 1,               # reviews mentioning any positive keyword
+    'open_statuses': ['OPERATIONAL', 'OPEN'],
+    'min_hours_open': 12,                # hours open on the first listed day > min_hours_open
+    'min_score': 3,
+    # The row-wise scorer never matched the last three criteria (it tested keywords against the list
+    # of review dicts, compared against 'OPEN' instead of 'OPERATIONAL', and split hours on '-' where
+    # Google uses '–'). Only the first three are enabled so existing labels stay the same; add the
+    # others here to count them.
+    'enabled_criteria': ['rating', 'user_ratings_total', 'price_level']
+}
+
+HOURS_RANGE_PATTERN = re.compile(
+    r'(\d{1,2})(?::(\d{2}))?\s*(AM|PM)?\s*[–-]\s*(\d{1,2})(?::(\d{2}))?\s*(AM|PM)?',
+    re.IGNORECASE
+)
+
+
+def parse_list_cell(value):
+    """CSV round-trips store lists as their Python repr; turn those back into lists."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value.startswith('['):
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+    return []
+
+
+def review_texts(value):
+    """Extracts the review texts from a reviews cell (list of review dicts or strings)."""
+    texts = []
+    for review in parse_list_cell(value):
+        if isinstance(review, dict):
+            texts.append(review.get('text', '') or '')
+        elif isinstance(review, str):
+            texts.append(review)
+    return texts
+
+
+def build_review_term_matrix(texts_per_shop):
+    """
+    Tokenizes every review once into a sparse shop x term matrix.
+
+    Each cell counts how many of the shop's reviews contain the term, so any keyword list can later
+    be checked with a column lookup instead of re-scanning review text.
+
+    Returns:
+        (CSR matrix of shape (n_shops, n_terms), dict term -> column)
+    """
+    shop_index = []
+    documents = []
+    for i, texts in enumerate(texts_per_shop):
+        shop_index.extend([i] * len(texts))
+        documents.extend(texts)
+
+    n_shops = len(texts_per_shop)
+    if not documents:
+        return sparse.csr_matrix((n_shops, 0), dtype=np.int16), {}
+
+    vectorizer = CountVectorizer(binary=True, lowercase=True, dtype=np.int16)
+    try:
+        review_terms = vectorizer.fit_transform(documents)
+    except ValueError:  # Only empty reviews
+        return sparse.csr_matrix((n_shops, 0), dtype=np.int16), {}
+
+    # Sum review rows into their shop
+    review_to_shop = sparse.csr_matrix(
+        (np.ones(len(documents), dtype=np.int16), (shop_index, np.arange(len(documents)))),
+        shape=(n_shops, len(documents))
+    )
+    return (review_to_shop @ review_terms).tocsr(), vectorizer.vocabulary_
+
+
+def _to_minutes(hour, minute, meridiem):
+    hour = int(hour) % 12 if meridiem else int(hour)
+    if meridiem and meridiem.upper() == 'PM':
+        hour += 12
+    return hour * 60 + int(minute or 0)
+
+
+def parse_day_hours(text):
+    """
+    Parses one weekday_text entry (e.g. 'Monday: 8:00 AM – 11:00 PM') into (open, close) minutes.
+
+    Closing times past midnight are returned as > 1440. Closed or unparseable days give (nan, nan).
+    """
+    if not isinstance(text, str):
+        return np.nan, np.nan
+    text = text.replace('\u202f', ' ').replace('\u2009', ' ')  # Google's narrow/thin spaces
+    if 'open 24 hours' in text.lower():
+        return 0, 24 * 60
+
+    ranges = HOURS_RANGE_PATTERN.findall(text)
+    if not ranges:
+        return np.nan, np.nan
+
+    first, last = ranges[0], ranges[-1]
+    # '8:00 – 11:00 AM' only marks the meridiem on the closing time
+    open_minutes = _to_minutes(first[0], first[1], first[2] or first[5])
+    close_minutes = _to_minutes(last[3], last[4], last[5])
+    if close_minutes <= open_minutes:
+        close_minutes += 24 * 60
+    return open_minutes, close_minutes
+
+
+def parse_hours_arrays(hours_column):
+    """Parses every shop's weekday_text once into (n_shops, 7) open/close minute arrays."""
+    open_minutes = np.full((len(hours_column), 7), np.nan)
+    close_minutes = np.full((len(hours_column), 7), np.nan)
+    for i, value in enumerate(hours_column):
+        for day, text in enumerate(parse_list_cell(value)[:7]):
+            open_minutes[i, day], close_minutes[i, day] = parse_day_hours(text)
+    return open_minutes, close_minutes
+
+
+def prepare_labeling_features(df, reviews=None):
+    """
+    Precomputes everything the success rules look at, so relabeling under new rules is pure
+    array arithmetic.
+
+    Args:
+        df: Shop DataFrame with rating, user_ratings_total, price_level, business_status, hours.
+        reviews: Review table (place_id, text, ...) joined on df['place_id']. When omitted, an
+            embedded 'reviews' column is used if present.
+    """
+    if reviews is not None:
+        grouped = reviews.dropna(subset=['text']).groupby('place_id')['text'].agg(list)
+        texts_per_shop = [grouped.get(place_id, []) for place_id in df['place_id']]
+    elif 'reviews' in df.columns:
+        texts_per_shop = [review_texts(v) for v in df['reviews']]
+    else:
+        texts_per_shop = [[] for _ in range(len(df))]
+    review_terms, vocabulary = build_review_term_matrix(texts_per_shop)
+    open_minutes, close_minutes = parse_hours_arrays(df['hours'].tolist())
+
+    return {
+        'rating': pd.to_numeric(df['rating'], errors='coerce').to_numpy(dtype=float),
+        'user_ratings_total': pd.to_numeric(df['user_ratings_total'], errors='coerce').to_numpy(dtype=float),
+        'price_level': pd.to_numeric(df['price_level'], errors='coerce').to_numpy(dtype=float),
+        'business_status': df['business_status'].fillna('').astype(str).str.upper().to_numpy(),
+        'review_terms': review_terms,
+        'vocabulary': vocabulary,
+        'open_minutes': open_minutes,
+        'close_minutes': close_minutes
+    }
+
+
+def keyword_hits(features, keywords):
+    """Number of reviews per shop containing each keyword, as an (n_shops, n_keywords) array."""
+    n_shops = features['review_terms'].shape[0]
+    columns = [features['vocabulary'].get(keyword.lower()) for keyword in keywords]
+    hits = np.zeros((n_shops, len(keywords)), dtype=np.int16)
+    found = [j for j, column in enumerate(columns) if column is not None]
+    if found:
+        hits[:, found] = features['review_terms'][:, [columns[j] for j in found]].toarray()
+    return hits
+
+
+def success_criteria(features, rules=None):
+    """Evaluates each success rule as a boolean column over all shops."""
+    rules = {**DEFAULT_SUCCESS_RULES, **(rules or {})}
+    hours_open = (features['close_minutes'][:, 0] - features['open_minutes'][:, 0]) / 60
+
+    # NaN comparisons are False, so missing values simply don't score
+    return pd.DataFrame({
+        'rating': features['rating'] >= rules['min_rating'],
+        'user_ratings_total': features['user_ratings_total'] > rules['min_user_ratings_total'],
+        'price_level': np.isin(features['price_level'], rules['price_levels']),
+        'reviews': keyword_hits(features, rules['positive_keywords']).sum(axis=1) >= rules['min_keyword_hits'],
+        'business_status': np.isin(features['business_status'], [s.upper() for s in rules['open_statuses']]),
+        'hours': hours_open > rules['min_hours_open']
+    })
+
+
+def label_success(features, rules=None):
+    """Returns 1 for shops meeting at least min_score of the enabled criteria, else 0."""
+    merged = {**DEFAULT_SUCCESS_RULES, **(rules or {})}
+    criteria = success_criteria(features, merged)[merged['enabled_criteria']]
+    score = criteria.sum(axis=1).to_numpy()
+    return (score >= merged['min_score']).astype(int)
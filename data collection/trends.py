@@ -1,10 +1,170 @@
 from pytrends.request import TrendReq
+from pytrends.exceptions import ResponseError
 import pandas as pd
-import matplotlib.pyplot as plt
+import hashlib
+import json
+import os
+import time
 
-def get_city_coffee_interest(city_name: str, show_plot: bool = False):
-    # Connect to Google Trends
-    pytrends = TrendReq(hl='en-US', tz=360)
+from http_backend import install
+
+# Coffee-related intent keywords, one set per city
+KEYWORD_TEMPLATES = {
+    "trend_yemeni_coffee": "yemeni coffee {city}",
+    "trend_study_cafe": "study cafe {city}",
+    "trend_chill_cafe": "chill cafe {city}",
+    "trend_coffee_shop": "coffee shop {city}",
+    "trend_best_cafe": "best cafe {city}"
+}
+
+# Sent in every payload so batches (which Google scales independently) share one scale
+ANCHOR_KEYWORD = "coffee shop"
+TRENDS_GEO = "US"
+TRENDS_TIMEFRAME = "2018-01-01 2023-12-31"
+TRENDS_CACHE_DIR = "trendsCache"
+
+
+def _series_cache_path(cache_dir, keyword, geo, timeframe):
+    digest = hashlib.sha1(f"{keyword}|{geo}|{timeframe}".encode("utf-8")).hexdigest()[:20]
+    return os.path.join(cache_dir, f"{digest}.json")
+
+
+def load_cached_series(cache_dir, keyword, geo, timeframe, anchor):
+    """Returns the cached anchor-relative series for a keyword, or None if missing."""
+    path = _series_cache_path(cache_dir, keyword, geo, timeframe)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        entry = json.load(f)
+    if entry["anchor"] != anchor:
+        return None
+    return pd.Series(entry["values"], index=pd.to_datetime(entry["dates"]), name=keyword, dtype=float)
+
+
+def save_cached_series(cache_dir, keyword, geo, timeframe, anchor, series):
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = {
+        "keyword": keyword,
+        "geo": geo,
+        "timeframe": timeframe,
+        "anchor": anchor,
+        "dates": [d.strftime("%Y-%m-%d") for d in series.index],
+        "values": [None if pd.isna(v) else float(v) for v in series]
+    }
+    with open(_series_cache_path(cache_dir, keyword, geo, timeframe), "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+
+def fetch_keyword_series(keywords, pytrends=None, geo=TRENDS_GEO, timeframe=TRENDS_TIMEFRAME,
+                         anchor=ANCHOR_KEYWORD, cache_dir=TRENDS_CACHE_DIR, pause=1.0, retries=3):
+    """
+    Fetches interest-over-time for many keywords with one Trends session.
+
+    Uncached keywords are packed four to a payload alongside the anchor keyword, and every series is
+    rescaled to percent of the anchor's average interest in its own payload, which makes series from
+    different payloads comparable. Results are cached per (keyword, geo, timeframe).
+
+    Keywords whose payload failed or came back without data are left out (and not cached), so
+    the next call requests them again.
+
+    Returns:
+        dict keyword -> pd.Series for every keyword that was cached or fetched
+    """
+    series = {}
+    missing = []
+    for keyword in dict.fromkeys(keywords):
+        cached = load_cached_series(cache_dir, keyword, geo, timeframe, anchor)
+        if cached is not None:
+            series[keyword] = cached
+        else:
+            missing.append(keyword)
+
+    print(f"Trends: {len(series)} keywords cached, {len(missing)} to fetch")
+    if not missing:
+        return series
+
+    pytrends = pytrends or TrendReq(hl='en-US', tz=360)
+    to_fetch = [k for k in missing if k != anchor]
+
+    # Trends accepts five keywords per payload, one of which is always the anchor
+    for i in range(0, len(to_fetch), 4):
+        batch = to_fetch[i:i + 4]
+        for attempt in range(retries):
+            try:
+                pytrends.build_payload([anchor] + batch, geo=geo, timeframe=timeframe)
+                data = pytrends.interest_over_time()
+                break
+            except ResponseError as e:
+                print(f"⚠️ Trends request failed ({e}), retrying in {pause * 2 ** (attempt + 1):.0f}s")
+                time.sleep(pause * 2 ** (attempt + 1))
+        else:
+            print(f"❌ Giving up on keywords: {batch}")
+            continue
+
+        if 'isPartial' in data.columns:
+            data = data.drop(columns=['isPartial'])
+
+        anchor_mean = data[anchor].mean() if anchor in data.columns else 0
+        if not anchor_mean:
+            print(f"⚠️ No Trends data returned for keywords: {batch}")
+            time.sleep(pause)
+            continue
+        for keyword in [anchor] + batch:
+            if keyword == anchor and anchor not in missing:
+                continue
+            if keyword not in data.columns:
+                continue
+            keyword_series = data[keyword].astype(float) * 100 / anchor_mean
+            series[keyword] = keyword_series
+            save_cached_series(cache_dir, keyword, geo, timeframe, anchor, keyword_series)
+
+        time.sleep(pause)
+
+    return series
+
+
+def build_city_trends_table(cities, table_path="cityCoffeeTrends.csv", **fetch_kwargs):
+    """
+    Builds (or extends) a city-level trends feature table with one row per city.
+
+    Cities already in the table at table_path are not requested again; a city is only added once
+    all its keywords were fetched, so cities whose requests failed are retried on the next run.
+    Each feature column holds a keyword's average interest as a percent of the anchor keyword's
+    average interest.
+    """
+    table = pd.read_csv(table_path) if os.path.exists(table_path) else pd.DataFrame(columns=['City'])
+    known = set(table['City'].astype(str).str.lower().str.strip())
+    new_cities = [c for c in dict.fromkeys(cities) if str(c).lower().strip() not in known]
+
+    if new_cities:
+        keywords = [template.format(city=city) for city in new_cities for template in KEYWORD_TEMPLATES.values()]
+        series = fetch_keyword_series(keywords, **fetch_kwargs)
+
+        rows, failed = [], []
+        for city in new_cities:
+            city_series = {column: series.get(template.format(city=city))
+                           for column, template in KEYWORD_TEMPLATES.items()}
+            if any(keyword_series is None for keyword_series in city_series.values()):
+                failed.append(city)
+                continue
+            row = {'City': str(city).lower().strip()}
+            for column, keyword_series in city_series.items():
+                row[column] = round(keyword_series.mean(), 2)
+            rows.append(row)
+
+        if failed:
+            print(f"⚠️ No Trends data for {failed}; they will be requested again next run")
+        if rows:
+            table = pd.concat([table, pd.DataFrame(rows)], ignore_index=True) if len(table) else pd.DataFrame(rows)
+            table.to_csv(table_path, index=False)
+            print(f"✅ Added {len(rows)} cities to {table_path}")
+
+    return table
+
+
+def get_city_coffee_interest(city_name: str, show_plot: bool = False, pytrends=None):
+    # Connect to Google Trends (pass a TrendReq to reuse one session across cities)
+    pytrends = pytrends or TrendReq(hl='en-US', tz=360)
 
     # Build coffee-related intent keywords
     kw_list = [
@@ -32,6 +192,7 @@ def get_city_coffee_interest(city_name: str, show_plot: bool = False):
 
     # Optionally show a trend plot
     if show_plot:
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(14, 6))
         for keyword in data.columns:
             plt.plot(data.index, data[keyword], label=keyword)
@@ -45,5 +206,7 @@ def get_city_coffee_interest(city_name: str, show_plot: bool = False):
 
     return averages
 
-#print(get_city_coffee_interest("Detroit", show_plot=False))
-print(get_city_coffee_interest("West Dearborn", show_plot=False))
\ No newline at end of file
+if __name__ == "__main__":
+    install()
+    #print(get_city_coffee_interest("Detroit", show_plot=False))
+    print(build_city_trends_table(["West Dearborn", "Dearborn", "Detroit", "Hamtramck"]))
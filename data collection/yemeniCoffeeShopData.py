@@ -1,13 +1,18 @@
 import googlemaps
 import pandas as pd
+import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import os
 
-load_dotenv()
+from http_backend import install
+from instrumentation import PROFILER, track, save_profile
+from review_store import split_reviews, save_review_table
+from success_labeling import prepare_labeling_features, label_success
 
-googlemapsKey = os.getenv("GOOGLE_MAPS_API_KEY")
-gmaps = googlemaps.Client(key=googlemapsKey)
+load_dotenv()
 
 search_points = [
     {"county": "Wayne", "city": "Dearborn", "lat": 42.3223, "lon": -83.1763},
@@ -19,28 +24,167 @@ search_points = [
     {"county": "St. Clair", "city": "Port Huron", "lat": 42.9709, "lon": -82.4249}
 ]
 
-results = []
-
-for loc in search_points:
-    print(f"Searching around {loc['city']}, {loc['county']} County...")
-
-    # Search for nearby Yemeni coffee places
-    response = gmaps.places_nearby(
-        location=(loc['lat'], loc['lon']),
-        radius=30000,
-        keyword="Yemeni coffee"
-    )
-
-    for place in response.get('results', []):
-        place_id = place['place_id']
-        
-        # Fetch detailed place information using the place_id
-        place_details = gmaps.place(place_id=place_id)
-        
-        # Extract desired data
-        details = place_details.get('result', {})
-        
+# Only the Place Details fields we actually store (billed per field group)
+DETAIL_FIELDS = [
+    "name",
+    "vicinity",
+    "rating",
+    "user_ratings_total",
+    "price_level",
+    "reviews",
+    "business_status",
+    "opening_hours"
+]
+
+DETAILS_CACHE_PATH = "placeDetailsCache.json"
+DETAILS_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # One week
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls at least 1/rate seconds apart."""
+
+    def __init__(self, calls_per_second: float):
+        self.interval = 1.0 / calls_per_second
+        self.lock = threading.Lock()
+        self.next_call = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class PlaceDetailsCache:
+    """On-disk Place Details responses keyed by place_id, each entry expiring after ttl seconds."""
+
+    def __init__(self, path: str = DETAILS_CACHE_PATH, ttl: float = DETAILS_CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, place_id):
+        entry = self.entries.get(place_id)
+        if entry is None or time.time() - entry["fetched_at"] > self.ttl:
+            return None
+        return entry["result"]
+
+    def set(self, place_id, result):
+        with self.lock:
+            self.entries[place_id] = {"fetched_at": time.time(), "result": result}
+
+    def save(self):
+        with self.lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+
+
+def search_places(gmaps, loc, radius=30000, keyword="Yemeni coffee", max_pages=3):
+    """
+    Nearby Search around one search point, following next_page_token past the first 20 results.
+    """
+    places = []
+    with track("google.nearby_search") as call:
+        response = gmaps.places_nearby(location=(loc['lat'], loc['lon']), radius=radius, keyword=keyword)
+        call['bytes'] = len(json.dumps(response))
+    pages = 1
+
+    while True:
+        places.extend(response.get('results', []))
+        token = response.get('next_page_token')
+        if not token or pages >= max_pages:
+            break
+
+        # The token takes a couple of seconds to become valid on Google's side
+        for _ in range(5):
+            time.sleep(2)
+            try:
+                with track("google.nearby_search") as call:
+                    response = gmaps.places_nearby(page_token=token)
+                    call['bytes'] = len(json.dumps(response))
+                break
+            except googlemaps.exceptions.ApiError as e:
+                if e.status != "INVALID_REQUEST":
+                    raise
+        else:
+            print(f"⚠️ Gave up on page {pages + 1} around {loc['city']}")
+            break
+        pages += 1
+
+    return places
+
+
+def fetch_place_details(gmaps, place_ids, cache, limiter, max_workers=8):
+    """
+    Fetches Place Details for each unique place_id concurrently, serving fresh entries from the cache.
+
+    Returns:
+        dict mapping place_id to its details result.
+    """
+    details = {}
+    to_fetch = []
+    for place_id in place_ids:
+        cached = cache.get(place_id)
+        if cached is not None:
+            details[place_id] = cached
+        else:
+            to_fetch.append(place_id)
+
+    print(f"Place Details: {len(details)} cached, {len(to_fetch)} to fetch")
+    PROFILER.cache_hit("google.place_details", len(details))
+    PROFILER.cache_miss("google.place_details", len(to_fetch))
+
+    def fetch(place_id):
+        limiter.wait()
+        try:
+            with track("google.place_details") as call:
+                response = gmaps.place(place_id=place_id, fields=DETAIL_FIELDS)
+                call['bytes'] = len(json.dumps(response))
+            return place_id, response.get('result', {})
+        except Exception as e:
+            print(f"❌ Failed to fetch details for {place_id}: {e}")
+            return place_id, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for place_id, result in executor.map(fetch, to_fetch):
+            if result is None:
+                continue
+            cache.set(place_id, result)
+            details[place_id] = result
+
+    cache.save()
+    return details
+
+
+def collect_yemeni_coffee_shops(gmaps, points=search_points, calls_per_second=5, max_workers=8,
+                                cache_path=DETAILS_CACHE_PATH, cache_ttl=DETAILS_CACHE_TTL_SECONDS):
+    """
+    Collects Yemeni coffee shops around every search point.
+
+    place_ids are deduplicated across the overlapping search radii before any details are requested,
+    so each shop costs at most one Place Details call (and none while its cache entry is fresh).
+    """
+    # place_id -> (search hit, search point it was first seen from)
+    hits = {}
+    for loc in points:
+        print(f"Searching around {loc['city']}, {loc['county']} County...")
+        for place in search_places(gmaps, loc):
+            hits.setdefault(place['place_id'], (place, loc))
+
+    cache = PlaceDetailsCache(cache_path, cache_ttl)
+    details_by_id = fetch_place_details(gmaps, list(hits), cache, RateLimiter(calls_per_second), max_workers)
+
+    results = []
+    for place_id, (place, loc) in hits.items():
+        details = details_by_id.get(place_id, {})
         results.append({
+            "place_id": place_id,
             "name": place["name"],
             "address": details.get("vicinity", ""),
             "lat": place["geometry"]["location"]["lat"],
@@ -53,59 +197,41 @@ for loc in search_points:
             "business_status": details.get("business_status", None),  # Open or closed
             "hours": details.get("opening_hours", {}).get("weekday_text", None)  # Business hours
         })
-        
-    time.sleep(2)  # Respect API rate limits
 
-# Remove duplicates (some businesses may appear in overlapping areas)
-df_shops = pd.DataFrame(results).drop_duplicates(subset=["name", "lat", "lon"])
+    # Same shop can still be listed under several place_ids (e.g. relocated listings)
+    return pd.DataFrame(results).drop_duplicates(subset=["name", "lat", "lon"])
 
 # Function to determine if a business is successful based on the metrics
-def determine_successful_businesses(df):
-    def is_successful(row):
-        score = 0
-        
-        # Rating: 1 if >= 4, else 0
-        if row['rating'] >= 4:
-            score += 1
-        
-        # User Ratings Total: 1 if > 100 reviews, else 0
-        if row['user_ratings_total'] > 100:
-            score += 1
-        
-        # Price Level: 1 if price level is 2 or 3 (balanced range), else 0
-        if row['price_level'] in [2, 3]:
-            score += 1
-        
-        # Reviews: Check for positive reviews (simplified logic for illustration)
-        positive_keywords = ['good', 'excellent', 'great', 'awesome']
-        if any(keyword in row['reviews'] for keyword in positive_keywords):
-            score += 1
-        
-        # Business Status: 1 if OPEN, else 0
-        if row['business_status'] == 'OPEN':
-            score += 1
-        
-        # Hours: 1 if open for more than 12 hours, else 0
-        try:
-            start_time, end_time = row['hours'][0].split(' - ')  # Assuming weekday_text is a list
-            start_hour = int(start_time.split(':')[0])
-            end_hour = int(end_time.split(':')[0])
-            if end_hour - start_hour > 12:
-                score += 1
-        except:
-            pass
-        
-        # Determine success: If score >= threshold (e.g., 4), it's successful
-        return 1 if score >= 3 else 0
-
-    # Apply the function to each row and add the new column 'isSuccessful'
-    df['isSuccessful'] = df.apply(is_successful, axis=1)
-    
+def determine_successful_businesses(df, rules=None, reviews=None):
+    """
+    Adds an 'isSuccessful' column by scoring every shop against the success rules at once.
+
+    Args:
+        df: Shop DataFrame as returned by collect_yemeni_coffee_shops.
+        rules: Overrides for success_labeling.DEFAULT_SUCCESS_RULES.
+        reviews: Review table keyed by place_id (see review_store); defaults to df['reviews'].
+    """
+    features = prepare_labeling_features(df, reviews)
+    df['isSuccessful'] = label_success(features, rules)
+
     return df
 
-# Apply the function to determine success of each business
-df_shops = determine_successful_businesses(df_shops)
 
-# Save the data to a CSV file
-df_shops.to_csv("yemeniCoffeeShops_with_success.csv", index=False)
-print("✅ Data saved to yemeniCoffeeShops_with_success.csv")
+if __name__ == "__main__":
+    cassette = install()
+    googlemapsKey = os.getenv("GOOGLE_MAPS_API_KEY")
+    if not googlemapsKey and cassette is not None:
+        googlemapsKey = "AIza-replay"  # Placeholder; keys are stripped from cassette lookups
+    gmaps = googlemaps.Client(key=googlemapsKey)
+
+    # Reviews go to their own table so the shop CSV stays lean
+    df_shops, df_reviews = split_reviews(collect_yemeni_coffee_shops(gmaps))
+    save_review_table(df_reviews, "yemeniCoffeeShopReviews.csv")
+
+    # Apply the function to determine success of each business
+    df_shops = determine_successful_businesses(df_shops, reviews=df_reviews)
+
+    # Save the data to a CSV file
+    df_shops.to_csv("yemeniCoffeeShops_with_success.csv", index=False)
+    print("✅ Data saved to yemeniCoffeeShops_with_success.csv and yemeniCoffeeShopReviews.csv")
+    save_profile("yemeniCoffeeShopData")
@@ -1,28 +1,123 @@
-def add_custom_features(df: pd.DataFrame) -> pd.DataFrame:
-    # Prevent divide-by-zero issues with a small epsilon
-    epsilon = 1e-6
+import hashlib
+import inspect
+import os
+import pickle
+import pandas as pd
+
+# Prevent divide-by-zero issues with a small epsilon
+epsilon = 1e-6
+
+# name -> {'inputs': columns the feature reads, 'func': formula, 'version': hash of the formula source}
+FEATURE_REGISTRY = {}
+
+
+def register_feature(name, inputs):
+    """Registers a derived feature along with the columns it depends on."""
+    def decorator(func):
+        source = inspect.getsource(func)
+        FEATURE_REGISTRY[name] = {
+            'inputs': list(inputs),
+            'func': func,
+            'version': hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+        }
+        return func
+    return decorator
+
+
+# restaurant_to_coffee_ratio: indicates market saturation or opportunity
+@register_feature('restaurant_to_coffee_ratio', ['# of Nearby Restaurants', '# of Nearby Coffee Shops'])
+def restaurant_to_coffee_ratio(df):
+    return df['# of Nearby Restaurants'] / (df['# of Nearby Coffee Shops'] + epsilon)
 
-    # restaurant_to_coffee_ratio: indicates market saturation or opportunity
-    df['restaurant_to_coffee_ratio'] = df['# of Nearby Restaurants'] / (df['# of Nearby Coffee Shops'] + epsilon)
 
-    # coffee_shop_density: shows how packed the area is with coffee shops
-    df['coffee_shop_density'] = df['# of Nearby Coffee Shops'] / (df['Population Density (Persons/Acre)'] + epsilon)
+# coffee_shop_density: shows how packed the area is with coffee shops
+@register_feature('coffee_shop_density', ['# of Nearby Coffee Shops', 'Population Density (Persons/Acre)'])
+def coffee_shop_density(df):
+    return df['# of Nearby Coffee Shops'] / (df['Population Density (Persons/Acre)'] + epsilon)
 
-    # potential_demand_index: proxies for foot traffic and transit access
-    df['potential_demand_index'] = (
-        df['pedestrian_score'] + 
-        df['transit_stops'] + 
+
+# potential_demand_index: proxies for foot traffic and transit access
+@register_feature('potential_demand_index', ['pedestrian_score', 'transit_stops',
+                                             'Population Density (Persons/Acre)', '# of Nearby Coffee Shops'])
+def potential_demand_index(df):
+    return (
+        df['pedestrian_score'] +
+        df['transit_stops'] +
         df['Population Density (Persons/Acre)']
     ) / (df['# of Nearby Coffee Shops'] + epsilon)
 
-    # mosque_index: potential cultural alignment
-    df['mosque_index'] = df['# of Nearby Mosques'] / (df['Population Density (Persons/Acre)'] + epsilon)
 
-    # affordability_index: indicates disposable income, normalized economic well-being
-    df['affordability_index'] = df['Median Household Income'] / (df['Percent People in Poverty'] + epsilon)
+# mosque_index: potential cultural alignment
+@register_feature('mosque_index', ['# of Nearby Mosques', 'Population Density (Persons/Acre)'])
+def mosque_index(df):
+    return df['# of Nearby Mosques'] / (df['Population Density (Persons/Acre)'] + epsilon)
+
+
+# affordability_index: indicates disposable income, normalized economic well-being
+@register_feature('affordability_index', ['Median Household Income', 'Percent People in Poverty'])
+def affordability_index(df):
+    return df['Median Household Income'] / (df['Percent People in Poverty'] + epsilon)
 
+
+def add_custom_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Computes every registered feature over the whole frame."""
+    for name, feature in FEATURE_REGISTRY.items():
+        df[name] = feature['func'](df)
     return df
 
-# Example usage:
-df_features = add_custom_features(df_prepared)
-df_features.to_csv("features_added_data.csv", index=False)
\ No newline at end of file
+
+def refresh_custom_features(df: pd.DataFrame, cache_path: str = "featureCache.pkl", key: str = 'GEOID') -> pd.DataFrame:
+    """
+    Incrementally updates the registered features.
+
+    A feature is recomputed only for rows whose input columns hash differently from the last run,
+    and for every row when its formula changed. Rows without a unique key are always recomputed.
+
+    Args:
+        df: Tract DataFrame with the features' input columns.
+        cache_path: Pickle holding the previous run's row hashes, values and formula versions.
+        key: Column identifying a tract across runs.
+    """
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            cache = pickle.load(f)
+
+    keys = df[key] if key in df.columns else pd.Series(pd.NA, index=df.index)
+    keyed = keys.notna() & ~keys.duplicated(keep=False)
+    new_cache = {}
+
+    for name, feature in FEATURE_REGISTRY.items():
+        row_hash = pd.util.hash_pandas_object(df[feature['inputs']], index=False).astype('UInt64')
+        previous = cache.get(name)
+
+        changed = pd.Series(True, index=df.index)
+        values = pd.Series(float('nan'), index=df.index)
+        if previous is not None and previous['version'] == feature['version']:
+            old = previous['table'].reindex(keys[keyed].to_numpy())
+            same = (old['hash'].array == row_hash[keyed].array).fillna(False)
+            changed[keyed] = ~same.to_numpy(dtype=bool)
+            values[keyed] = old['value'].to_numpy()
+
+        if changed.any():
+            values[changed] = feature['func'](df.loc[changed]).to_numpy()
+        df[name] = values
+
+        new_cache[name] = {
+            'version': feature['version'],
+            'table': pd.DataFrame({'hash': row_hash[keyed].array, 'value': values[keyed].to_numpy()},
+                                  index=keys[keyed].to_numpy())
+        }
+        print(f"{name}: recomputed {int(changed.sum())} of {len(df)} rows")
+
+    with open(cache_path, 'wb') as f:
+        pickle.dump(new_cache, f)
+
+    return df
+
+
+if __name__ == "__main__":
+    # Example usage:
+    df_prepared = pd.read_csv("C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/cleaned_normalized_data.csv")
+    df_features = add_custom_features(df_prepared)
+    df_features.to_csv("features_added_data.csv", index=False)
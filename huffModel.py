@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0
+
+# Huff model defaults: utility = attractiveness * distance^-DISTANCE_DECAY
+DISTANCE_DECAY = 2.0
+# Pairs farther apart than this don't compete for the same customers
+CUTOFF_KM = 10.0
+# Floor for tract-to-itself and same-block distances so utilities stay finite
+MIN_DISTANCE_KM = 0.25
+# Tract rows queried per block, bounding the size of the intermediate neighbor lists
+BLOCK_SIZE = 2048
+# Coffee demand weight of a tract
+DEMAND_COL = 'Population Density (Persons/Acre)'
+
+
+def sparse_distances(lat_a, lon_a, lat_b, lon_b, cutoff_km=CUTOFF_KM, min_km=MIN_DISTANCE_KM):
+    """
+    Great-circle distances (km) between every a-point and b-point within cutoff_km, as a CSR
+    matrix (len(a) x len(b)).
+
+    A haversine BallTree over the b-points answers radius queries for blocks of a-points, so pairs
+    beyond the cutoff are never materialized. Stored distances are floored at min_km, so a stored
+    entry is never zero.
+    """
+    a = np.radians(np.column_stack([lat_a, lon_a]).astype(float))
+    b = np.radians(np.column_stack([lat_b, lon_b]).astype(float))
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        return sparse.csr_matrix((n, m))
+
+    tree = BallTree(b, metric='haversine')
+    rows, cols, values = [], [], []
+    for start in range(0, n, BLOCK_SIZE):
+        neighbors, distances = tree.query_radius(a[start:start + BLOCK_SIZE], r=cutoff_km / EARTH_RADIUS_KM,
+                                                 return_distance=True)
+        counts = [len(i) for i in neighbors]
+        rows.append(np.repeat(np.arange(start, start + len(counts)), counts))
+        cols.append(np.concatenate(neighbors))
+        values.append(np.maximum(np.concatenate(distances) * EARTH_RADIUS_KM, min_km))
+
+    return sparse.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=(n, m))
+
+
+def demand_points(tracts, demand_col=DEMAND_COL, preprocessor=None):
+    """
+    lat, lon and raw demand of each distinct tract location.
+
+    Args:
+        tracts: DataFrame with lat, lon and the demand column.
+        preprocessor: The fitted TractPreprocessor when the demand column is min-max scaled; its values
+            are mapped back to raw units, so the least dense tract doesn't count as zero demand.
+    """
+    demand = tracts[['lat', 'lon']].copy()
+    values = tracts[demand_col].to_numpy(dtype=float, na_value=np.nan)
+    if preprocessor is not None:
+        values = preprocessor.unscale(demand_col, values)
+    demand[demand_col] = values
+    # Labeling can repeat a tract once per matched shop; each location is one demand point
+    return demand.dropna(subset=['lat', 'lon']).drop_duplicates(subset=['lat', 'lon']).reset_index(drop=True)
+
+
+def huff_market_share(tracts, competitors, demand=None, demand_col=DEMAND_COL,
+                      decay=DISTANCE_DECAY, cutoff_km=CUTOFF_KM, attractiveness=1.0):
+    """
+    Expected share of nearby coffee demand a new shop at each tract's centroid would capture.
+
+    Each demand point j picks the new shop at tract i with the Huff probability
+        P_ij = A * d_ij^-decay / (A * d_ij^-decay + sum_k A_k * d_jk^-decay)
+    where k runs over the existing competitors (cafes and known Yemeni shops) within cutoff_km.
+
+    Args:
+        tracts: DataFrame with lat and lon of the candidate tracts.
+        competitors: DataFrame with lat, lon and optionally an 'attractiveness' column (default 1).
+        demand: Demand points (see demand_points); default: the tracts themselves, whose demand
+            column must then be in raw units.
+        demand_col: Column used as each demand point's coffee demand weight.
+        decay: Distance-decay exponent.
+        cutoff_km: Pairs farther apart than this are ignored.
+        attractiveness: Attractiveness of the hypothetical new shop.
+
+    Returns:
+        DataFrame indexed like tracts with 'huff_market_share' (captured / reachable demand) and
+        'huff_captured_demand'.
+    """
+    valid = tracts['lat'].notna() & tracts['lon'].notna()
+    t = tracts.loc[valid]
+    d = demand_points(t, demand_col) if demand is None else demand.dropna(subset=['lat', 'lon'])
+    weight = d[demand_col].fillna(0).to_numpy(dtype=float)
+
+    # Competition each demand point already faces
+    competition = np.zeros(len(d))
+    if len(competitors):
+        to_competitors = sparse_distances(d['lat'], d['lon'], competitors['lat'], competitors['lon'], cutoff_km)
+        weights = competitors['attractiveness'].to_numpy(dtype=float) if 'attractiveness' in competitors.columns \
+            else np.ones(len(competitors))
+        utility = to_competitors.copy()
+        utility.data = utility.data ** -decay
+        competition = utility @ weights
+
+    # New-shop utility from each candidate tract i to each demand point j
+    to_demand = sparse_distances(t['lat'], t['lon'], d['lat'], d['lon'], cutoff_km).tocoo()
+    new_utility = attractiveness * to_demand.data ** -decay
+    probability = new_utility / (new_utility + competition[to_demand.col])
+
+    captured = np.bincount(to_demand.row, weights=probability * weight[to_demand.col], minlength=len(t))
+    reachable = np.bincount(to_demand.row, weights=weight[to_demand.col], minlength=len(t))
+
+    result = pd.DataFrame(index=tracts.index, columns=['huff_market_share', 'huff_captured_demand'], dtype=float)
+    result.loc[valid, 'huff_market_share'] = np.divide(captured, reachable, out=np.zeros(len(t)), where=reachable > 0)
+    result.loc[valid, 'huff_captured_demand'] = captured
+    return result
+
+
+def load_competitors(shops_csv=None, pois_csv=None):
+    """Existing competitors: known Yemeni shops plus cafes from a POI table (type, lat, lon)."""
+    frames = []
+    if shops_csv:
+        frames.append(pd.read_csv(shops_csv, usecols=['lat', 'lon']))
+    if pois_csv:
+        pois = pd.read_csv(pois_csv)
+        frames.append(pois.loc[pois['type'] == 'cafe', ['lat', 'lon']])
+    if not frames:
+        return pd.DataFrame(columns=['lat', 'lon'])
+    return pd.concat(frames, ignore_index=True).dropna()
+
+
+def add_huff_features(df, competitors, **kwargs):
+    """Adds huff_market_share and huff_captured_demand to a tract DataFrame."""
+    df[['huff_market_share', 'huff_captured_demand']] = huff_market_share(df, competitors, **kwargs)
+    return df
+
+
+if __name__ == "__main__":
+    # Example usage:
+    df_features = pd.read_csv("C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/cleaned_normalized_data.csv")
+    competitors = load_competitors(
+        shops_csv="C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/yemeniCoffeeShopsWithSuccess.csv",
+        pois_csv="C:/Users/Owner/Desktop/code/cafe-compass/data collection/osmPois.csv"
+    )
+    # The cleaned file is min-max scaled; demand is weighted in persons/acre
+    from tractPreprocessor import TractPreprocessor
+    preprocessor = TractPreprocessor.load("C:/Users/Owner/Desktop/code/cafe-compass/tract_preprocessor.joblib")
+    df_features = add_huff_features(df_features, competitors, demand=demand_points(df_features, preprocessor=preprocessor))
+    print(df_features[['Tract Code (id)', 'City', 'huff_market_share']].sort_values(by='huff_market_share', ascending=False).head(10))
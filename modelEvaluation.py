@@ -0,0 +1,132 @@
+import json
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.inspection import permutation_importance
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import GroupKFold
+
+from huffModel import EARTH_RADIUS_KM
+
+IMPORTANCE_CACHE_DIR = "importanceCache"
+GRID_KM = 10.0
+
+
+def spatial_groups(df: pd.DataFrame, by: str = 'county', grid_km: float = GRID_KM) -> pd.Series:
+    """
+    Spatial block of every tract, so neighbouring tracts land in the same CV fold.
+
+    Args:
+        by: 'county' (county_id, or the county part of GEOID) or 'grid' (square lat/lon cells).
+        grid_km: Cell size for 'grid'.
+    """
+    if by == 'county':
+        if 'county_id' in df.columns and df['county_id'].notna().all():
+            return df['county_id'].astype(int)
+        return (df['GEOID'] // 10**6).astype(int)
+    if by == 'grid':
+        cell_deg_lat = grid_km / (np.pi * EARTH_RADIUS_KM / 180)
+        cell_deg_lon = cell_deg_lat / np.cos(np.radians(df['lat'].mean()))
+        rows = np.floor(df['lat'] / cell_deg_lat).astype(int)
+        cols = np.floor(df['lon'] / cell_deg_lon).astype(int)
+        return rows.astype(str) + '_' + cols.astype(str)
+    raise ValueError(f"Unknown spatial grouping {by!r}; expected 'county' or 'grid'")
+
+
+def positive_proba(model, X):
+    """Probability of the successful class, 0 when the model never saw a successful tract."""
+    classes = list(model.classes_)
+    if 1 not in classes:
+        return np.zeros(len(X))
+    return model.predict_proba(X)[:, classes.index(1)]
+
+
+def model_version(model, features) -> str:
+    """Content hash of a fitted model and its feature list."""
+    return joblib.hash((model, list(features)))
+
+
+def permutation_importances(model, X: pd.DataFrame, y: pd.Series, n_repeats: int = 10, n_jobs: int = -1,
+                            scoring: str = 'roc_auc', random_state: int = 42,
+                            cache_dir: str = IMPORTANCE_CACHE_DIR) -> pd.DataFrame:
+    """
+    Permutation importance of every feature, shuffled n_repeats times in parallel over features.
+
+    Results are cached under the model version and a hash of the evaluation data, so re-running
+    a report for an unchanged model reads them back instead of re-scoring.
+    """
+    key = joblib.hash((model_version(model, X.columns), X, y, n_repeats, scoring, random_state))
+    cache_path = os.path.join(cache_dir, f"{key}.joblib")
+    if os.path.exists(cache_path):
+        return joblib.load(cache_path)
+
+    result = permutation_importance(model, X, y, n_repeats=n_repeats, n_jobs=n_jobs, scoring=scoring,
+                                    random_state=random_state)
+    importances = pd.DataFrame({
+        'feature': X.columns,
+        'importance_mean': result.importances_mean,
+        'importance_std': result.importances_std
+    }).sort_values('importance_mean', ascending=False, ignore_index=True)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    joblib.dump(importances, cache_path)
+    return importances
+
+
+def spatial_cross_validate(estimator, X: pd.DataFrame, y: pd.Series, groups: pd.Series, n_splits: int = 5,
+                           n_repeats: int = 10, n_jobs: int = -1, cache_dir: str = IMPORTANCE_CACHE_DIR) -> dict:
+    """
+    Group K-fold CV over spatial blocks, with out-of-fold permutation importances.
+
+    Returns:
+        {'folds': per-fold metrics DataFrame, 'importances': importances averaged over the folds
+         whose training and held-out blocks both contain both classes}
+    """
+    if groups.nunique() < 2:
+        raise ValueError(f"Spatial cross-validation needs at least 2 spatial groups, got {groups.nunique()}; "
+                         "use grid blocks or a random holdout")
+    n_splits = min(n_splits, groups.nunique())
+    folds, fold_importances = [], []
+    for fold, (train, test) in enumerate(GroupKFold(n_splits=n_splits).split(X, y, groups)):
+        model = clone(estimator).fit(X.iloc[train], y.iloc[train])
+        X_test, y_test = X.iloc[test], y.iloc[test]
+        proba = positive_proba(model, X_test)
+        both_classes = y_test.nunique() == 2
+
+        folds.append({
+            'fold': fold,
+            'test_groups': int(groups.iloc[test].nunique()),
+            'test_rows': len(test),
+            'accuracy': accuracy_score(y_test, model.predict(X_test)),
+            'f1': f1_score(y_test, model.predict(X_test), zero_division=0),
+            'roc_auc': roc_auc_score(y_test, proba) if both_classes else np.nan
+        })
+        # A fold trained on one class can't rank anything (e.g. every success in the held-out county)
+        if both_classes and len(model.classes_) == 2:
+            fold_importances.append(permutation_importances(model, X_test, y_test, n_repeats=n_repeats,
+                                                            n_jobs=n_jobs, cache_dir=cache_dir))
+
+    importances = pd.DataFrame(columns=['feature', 'importance_mean', 'importance_std'])
+    if fold_importances:
+        importances = (pd.concat(fold_importances)
+                       .groupby('feature', as_index=False)[['importance_mean', 'importance_std']].mean()
+                       .sort_values('importance_mean', ascending=False, ignore_index=True))
+
+    return {'folds': pd.DataFrame(folds), 'importances': importances}
+
+
+def save_evaluation_report(evaluation: dict, path: str, **details) -> None:
+    """Writes the CV folds, their means and the importances as JSON."""
+    folds = evaluation['folds']
+    # Round-trip through to_json so NaN (single-class folds) becomes null
+    report = {
+        **details,
+        'mean': json.loads(folds[['accuracy', 'f1', 'roc_auc']].mean().round(4).to_json()),
+        'folds': json.loads(folds.round(4).to_json(orient='records')),
+        'importances': json.loads(evaluation['importances'].round(6).to_json(orient='records'))
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"✅ Evaluation report saved to {path}")
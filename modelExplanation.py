@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Contributions listed per tract, largest absolute value first
+TOP_FEATURES = 3
+EXPLANATION_COLUMN = 'top_features'
+
+
+def compile_tree_paths(model, features) -> dict:
+    """
+    Per-node contribution matrices of a fitted RandomForestClassifier, stacked over all trees.
+
+    Walking a tree from the root, every split changes the node's success probability; that change
+    is credited to the split feature. Row `node` of the stacked matrix holds the change on the edge
+    into that node, so a tract's contributions are its decision-path indicator times the matrix.
+    Compiled once per model (and stored in the model bundle), so explaining a batch is one
+    decision_path call and one sparse product.
+
+    Returns:
+        {'bias': mean root probability, 'paths': (total nodes x features) CSR, 'features': list}
+    """
+    classes = list(model.classes_)
+    n_trees = len(model.estimators_)
+    if 1 not in classes:
+        total_nodes = sum(tree.tree_.node_count for tree in model.estimators_)
+        return {'bias': 0.0, 'paths': sparse.csr_matrix((total_nodes, len(features))), 'features': list(features)}
+
+    positive = classes.index(1)
+    biases, blocks = [], []
+    for tree in model.estimators_:
+        t = tree.tree_
+        counts = t.value[:, 0, :]
+        probability = counts[:, positive] / counts.sum(axis=1)
+
+        parent = np.full(t.node_count, -1)
+        split = np.flatnonzero(t.children_left >= 0)
+        parent[t.children_left[split]] = split
+        parent[t.children_right[split]] = split
+
+        child = np.flatnonzero(parent >= 0)
+        delta = probability[child] - probability[parent[child]]
+        blocks.append(sparse.csr_matrix((delta / n_trees, (child, t.feature[parent[child]])),
+                                        shape=(t.node_count, len(features))))
+        biases.append(probability[0])
+
+    return {'bias': float(np.mean(biases)), 'paths': sparse.vstack(blocks).tocsr(), 'features': list(features)}
+
+
+def tree_contributions(model, X, compiled: dict = None) -> pd.DataFrame:
+    """
+    Per-tract, per-feature contributions to the predicted success probability.
+
+    bias + the row sum equals predict_proba(X)[:, 1] for every tract.
+    """
+    features = list(X.columns)
+    compiled = compiled or compile_tree_paths(model, features)
+    indicator, _ = model.decision_path(X)
+    return pd.DataFrame((indicator @ compiled['paths']).toarray(), index=X.index, columns=features)
+
+
+def top_contributors(contributions: pd.DataFrame, k: int = TOP_FEATURES) -> pd.Series:
+    """'feature +0.12; feature -0.05; ...' strings of the k largest contributions by magnitude."""
+    values = contributions.to_numpy()
+    order = np.argsort(-np.abs(values), axis=1, kind='stable')[:, :k]
+    names = np.asarray(contributions.columns)
+    return pd.Series(['; '.join(f"{names[j]} {row[j]:+.2f}" for j in top) for row, top in zip(values, order)],
+                     index=contributions.index)
+
+
+def add_explanations(df: pd.DataFrame, model, X, compiled: dict = None, k: int = TOP_FEATURES) -> pd.DataFrame:
+    """Stores each tract's top contributing features next to predicted_success_prob."""
+    df[EXPLANATION_COLUMN] = top_contributors(tree_contributions(model, X, compiled), k).to_numpy()
+    return df
@@ -1,25 +1,43 @@
+import json
+import os
+import sys
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report
-from sklearn.model_selection import train_test_split
-import re
-from geopy.geocoders import Nominatim
 
-# Function to extract the city from the address field
-geolocator = Nominatim(user_agent="cafe_compass")
+from featureEngineering import add_custom_features
+from tractSchema import feature_frame, read_tract_table
+from tractPreprocessor import TractPreprocessor, clean_city_name, save_model_bundle
+
+if __name__ == "__main__":
+    # Importers (cafe_compass.py, benchmarks) put "data collection" on sys.path themselves
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data collection"))
+
+# Created on first use so importing this module doesn't pull in geopy
+geolocator = None
+
+def get_geolocator():
+    global geolocator
+    if geolocator is None:
+        from geopy.geocoders import Nominatim
+        geolocator = Nominatim(user_agent="cafe_compass")
+    return geolocator
 
 # Global cache dictionary
 geocode_cache = {}
 
 def extract_city(lat, lon):
     """Extract the city based on latitude and longitude using reverse geocoding"""
+    # Lives in "data collection", which only the CLI and benchmarks put on sys.path
+    from instrumentation import PROFILER, track
     key = (round(lat, 5), round(lon, 5))
     if key in geocode_cache:
+        PROFILER.cache_hit("nominatim.reverse")
         return geocode_cache[key].get('city', '')
 
     if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
-        location = geolocator.reverse((lat, lon), language='en')
+        PROFILER.cache_miss("nominatim.reverse")
+        with track("nominatim.reverse") as call:
+            location = get_geolocator().reverse((lat, lon), language='en')
+            call['bytes'] = len(json.dumps(location.raw)) if location else 0
         if location:
             address_components = location.raw.get('address', {})
             geocode_cache[key] = address_components
@@ -28,12 +46,17 @@ def extract_city(lat, lon):
 
 def extract_county(lat, lon):
     """Extract the county based on latitude and longitude using reverse geocoding"""
+    from instrumentation import PROFILER, track
     key = (round(lat, 5), round(lon, 5))
     if key in geocode_cache:
+        PROFILER.cache_hit("nominatim.reverse")
         return geocode_cache[key].get('county', '')
 
     if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
-        location = geolocator.reverse((lat, lon), language='en')
+        PROFILER.cache_miss("nominatim.reverse")
+        with track("nominatim.reverse") as call:
+            location = get_geolocator().reverse((lat, lon), language='en')
+            call['bytes'] = len(json.dumps(location.raw)) if location else 0
         if location:
             address_components = location.raw.get('address', {})
             geocode_cache[key] = address_components
@@ -41,14 +64,6 @@ def extract_county(lat, lon):
     return ""
 
 
-def clean_city_name(city):
-    """Normalize city names by removing unwanted suffixes and punctuation."""
-    if isinstance(city, str):
-        city = city.lower().strip()  # Convert to lowercase and remove extra spaces
-        city = re.sub(r'\s*twp$', '', city)  # Remove 'twp' (township) suffix
-        city = re.sub(r'\s*\(.*\)', '', city)  # Remove text inside parentheses
-    return city
-
 def clean_county_name(county):
     """Standardize county names: lowercase, strip, remove 'county' suffix."""
     if isinstance(county, str):
@@ -57,68 +72,63 @@ def clean_county_name(county):
     return county
 
 
+def add_location_names(df: pd.DataFrame) -> pd.DataFrame:
+    """Reverse geocodes counties (cached per coordinate)."""
+    print("applying counties.")
+    df['county'] = df.apply(lambda row: extract_county(row['lat'], row['lon']), axis=1)
+    df['county'] = df['county'].astype(str).str.lower().str.strip()
+    return df
+
 # Clean and prepare the dataset
-def clean_and_prepare_dataset(file_path: str, output_path: str = "cleaned_normalized_data.csv") -> pd.DataFrame:
-    df = pd.read_csv(file_path)
-    df.dropna(inplace=True)
+def clean_and_prepare_dataset(file_path: str, output_path: str = "cleaned_normalized_data.csv",
+                              chunksize: int = None,
+                              preprocessor_path: str = "tract_preprocessor.joblib") -> pd.DataFrame:
+    """
+    Cleans, brackets and min-max normalizes the raw tract CSV.
 
-    # Convert Percent People in Poverty to decimal
-    df['Percent People in Poverty'] = df['Percent People in Poverty'] / 100
+    The fitted TractPreprocessor is saved to preprocessor_path so training can bundle it with the
+    model and new tracts can later be scored without refitting.
 
-    # Create income brackets
-    df['income_bracket'] = pd.cut(df['Median Household Income'], 
-                                  bins=[0, 35000, 60000, 100000, float('inf')], 
-                                  labels=['Low', 'Middle', 'Upper-Middle', 'High'])
+    With chunksize set, the file is streamed in two passes (min/max scan, then transform and
+    append to output_path) so memory stays constant; the fitted preprocessor is returned
+    instead of the full frame.
+    """
+    preprocessor = TractPreprocessor()
 
-    # Create density brackets
-    df['density_bracket'] = pd.cut(df['Population Density (Persons/Acre)'],
-                                   bins=[0, 5, 20, 50, float('inf')],
-                                   labels=['Low', 'Moderate', 'Dense', 'Very Dense'])
+    if chunksize:
+        for chunk in pd.read_csv(file_path, chunksize=chunksize):
+            preprocessor.partial_fit(preprocessor.prepare(chunk))
 
-    # Normalize the numeric columns
-    numeric_cols = [
-        "Median Age", 
-        "Median Household Income", 
-        "Percent People in Poverty", 
-        "Population Density (Persons/Acre)", 
-        "# of Nearby Restaurants", 
-        "# of Nearby Coffee Shops", 
-        "# of Nearby Mosques", 
-        "transit_stops", 
-        "pedestrian_score"
-    ]
+        preprocessor.save(preprocessor_path)
 
-    scaler = MinMaxScaler()
-    df[numeric_cols] = scaler.fit_transform(df[numeric_cols])
-    
-    df['City'] = df['City'].apply(clean_city_name)
+        first = True
+        for chunk in pd.read_csv(file_path, chunksize=chunksize):
+            chunk = preprocessor.prepare(chunk)
+            if chunk.empty:
+                continue
+            chunk = add_location_names(preprocessor.transform(chunk))
+            chunk.to_csv(output_path, index=False, mode='w' if first else 'a', header=first)
+            first = False
+
+        return preprocessor
+
+    df = preprocessor.prepare(pd.read_csv(file_path))
+
+    # Normalize the numeric columns
+    df = preprocessor.fit(df).transform(df)
+    preprocessor.save(preprocessor_path)
     
-    print("applying counties.")
-    df['county'] = df.apply(lambda row: extract_county(row['lat'], row['lon']), axis=1)
-    df['county'] = df['county'].astype(str).str.lower().str.strip()
+    df = add_location_names(df)
 
     df.reset_index(drop=True, inplace=True)
     df.to_csv(output_path, index=False)
 
     return df
 
-# Add custom features to the dataset
-def add_custom_features(df: pd.DataFrame) -> pd.DataFrame:
-    epsilon = 1e-6
-    df['restaurant_to_coffee_ratio'] = df['# of Nearby Restaurants'] / (df['# of Nearby Coffee Shops'] + epsilon)
-    df['coffee_shop_density'] = df['# of Nearby Coffee Shops'] / (df['Population Density (Persons/Acre)'] + epsilon)
-    df['potential_demand_index'] = (
-        df['pedestrian_score'] + 
-        df['transit_stops'] + 
-        df['Population Density (Persons/Acre)']
-    ) / (df['# of Nearby Coffee Shops'] + epsilon)
-    df['mosque_index'] = df['# of Nearby Mosques'] / (df['Population Density (Persons/Acre)'] + epsilon)
-    df['affordability_index'] = df['Median Household Income'] / (df['Percent People in Poverty'] + epsilon)
-    return df
-
 # Label neighborhoods based on known Yemeni coffee shop data
 def label_success_from_known_shops(df: pd.DataFrame, known_shop_data_path: str) -> pd.DataFrame:
-    known_shops = pd.read_csv(known_shop_data_path)
+    # Reviews live in their own table, only the location and label are needed here
+    known_shops = pd.read_csv(known_shop_data_path, usecols=['lat', 'lon', 'isSuccessful'])
 
     # Extract and clean city and county info using reverse geocoding (cached)
     print("Reverse geocoding cities for Yemeni coffee shops...")
@@ -160,8 +170,47 @@ def label_success_from_known_shops(df: pd.DataFrame, known_shop_data_path: str)
 
 
 
+def load_training_preprocessor(preprocessor_path: str, df: pd.DataFrame):
+    """
+    Loads the preprocessor saved by clean_and_prepare_dataset for bundling with the model.
+
+    Raises if it could not have produced the training data (e.g. a stale file from another run);
+    returns None with a warning when there is none, in which case the bundle can't score raw tracts.
+    """
+    if not preprocessor_path or not os.path.exists(preprocessor_path):
+        print(f"⚠️ No preprocessor at {preprocessor_path}; the model bundle won't be able to score raw tracts.")
+        return None
+    preprocessor = TractPreprocessor.load(preprocessor_path)
+    mismatched = preprocessor.mismatched_columns(df)
+    if mismatched:
+        raise ValueError(f"{preprocessor_path} doesn't match the training data ({mismatched} weren't "
+                         f"scaled by it); re-run cleaning or pass the preprocessor it saved")
+    return preprocessor
+
+
 # Train a model to predict success based on labeled data
-def train_success_prediction_model(df: pd.DataFrame) -> pd.DataFrame:
+def train_success_prediction_model(df: pd.DataFrame, preprocessor_path: str = "tract_preprocessor.joblib",
+                                   model_path: str = "success_model.joblib", cv: str = None, n_splits: int = 5,
+                                   report_path: str = "model_evaluation.json",
+                                   competitors: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Trains the success model, scores every tract and saves the model bundle.
+
+    With cv=None the model is checked on a random 25% holdout. With cv='county' or cv='grid',
+    neighbouring tracts are kept in the same fold (spatial group K-fold), out-of-fold permutation
+    importances are computed, the report is written to report_path and the final model is fit on
+    every tract.
+
+    With competitors (huffModel.load_competitors) the Huff market share is computed here against
+    the training tracts' raw density and used as a feature; the competitors and demand points are
+    bundled so score_new_tracts computes the same feature for new tracts.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import classification_report
+    from sklearn.model_selection import train_test_split
+
+    from modelExplanation import add_explanations, compile_tree_paths
+
     features = [
         'mosque_index', 
         'potential_demand_index', 
@@ -170,18 +219,45 @@ def train_success_prediction_model(df: pd.DataFrame) -> pd.DataFrame:
         'coffee_shop_density',
         '# of Nearby Coffee Shops'
     ]
-
-    X = df[features]
-    df['isSuccessful'] = df_labeled['isSuccessful'].fillna(0)
+    # Ship the model with the preprocessing it was trained on, so new tracts score without refitting
+    preprocessor = load_training_preprocessor(preprocessor_path, df)
+
+    # Competitor-aware demand share
+    huff = None
+    if competitors is not None:
+        if preprocessor is None:
+            print("⚠️ Skipping the Huff feature: demand density can't be unscaled without the preprocessor.")
+        else:
+            from huffModel import add_huff_features, demand_points
+            kept = [column for column in ('lat', 'lon', 'attractiveness') if column in competitors.columns]
+            huff = {'competitors': competitors[kept].reset_index(drop=True),
+                    'demand': demand_points(df, preprocessor=preprocessor)}
+            df = add_huff_features(df, **huff)
+            features.append('huff_market_share')
+
+    # One float32 block: sklearn uses it as-is instead of copying and converting
+    X = feature_frame(df, features)
+    df['isSuccessful'] = df['isSuccessful'].fillna(0)
     y = df['isSuccessful']
     
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=42)
     clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X_train, y_train)
 
-    y_pred = clf.predict(X_test)
-    print(classification_report(y_test, y_pred))
+    if cv:
+        from modelEvaluation import spatial_groups, spatial_cross_validate, save_evaluation_report
+
+        groups = spatial_groups(df, by=cv)
+        evaluation = spatial_cross_validate(clf, X, y, groups, n_splits=n_splits)
+        print(evaluation['folds'].to_string(index=False))
+        print(evaluation['importances'].to_string(index=False))
+        save_evaluation_report(evaluation, report_path, cv=cv, features=features)
+        clf.fit(X, y)
+    else:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=42)
+        clf.fit(X_train, y_train)
+
+        y_pred = clf.predict(X_test)
+        print(classification_report(y_test, y_pred))
 
     # Predict success probability for all areas
     if hasattr(clf, "predict_proba"):
@@ -189,6 +265,12 @@ def train_success_prediction_model(df: pd.DataFrame) -> pd.DataFrame:
     else:
         df['predicted_success_prob'] = clf.predict(X)
 
+    # Per-tract breakdown of the prediction, stored next to it so the map doesn't recompute anything
+    explainer = compile_tree_paths(clf, features)
+    df = add_explanations(df, clf, X, explainer)
+
+    save_model_bundle(model_path, clf, features, preprocessor, explainer, huff)
+
     return df
 
 def add_city_column_to_yemeni_shops(csv_path: str, output_path: str):
@@ -208,35 +290,47 @@ def add_city_column_to_yemeni_shops(csv_path: str, output_path: str):
     return df
 
 # Run the entire processing pipeline
-raw_data_path = "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/completeCafeCompassData.csv"
-cleaned_data_path = "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/cleaned_normalized_data.csv"
-yemeni_data_path = "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/yemeniCoffeeShopsWithSuccess.csv"
-
-# Step 1: Clean and Normalize the data
-#df_prepared = clean_and_prepare_dataset(raw_data_path)
-print("step 1 done")
-df_prepared = pd.read_csv(cleaned_data_path)
-
-# Step 2: Add custom features
-df_features = add_custom_features(df_prepared)
-print("step 2 done")
-
-df_test = pd.read_csv(yemeni_data_path, usecols=['city','county', 'isSuccessful'])
-print("step 3 done")
-
-# Step 3: Label neighborhoods based on known Yemeni coffee shops
-df_labeled = label_success_from_known_shops(df_features, yemeni_data_path)
-print("step 4 done")
-print(df_labeled.columns)
-print(df_labeled['isSuccessful'].value_counts())
-
-# Step 4: Train a Random Forest model and predict success probabilities
-df_scored = train_success_prediction_model(df_labeled)
-print("step 5 done")
-
-# Step 5: Save the final dataset with predicted success probabilities
-df_scored.to_csv("final_scored_with_predictions.csv", index=False)
-print("step 6 done")
-
-# Output top 10 neighborhoods with highest predicted success probability
-print(df_scored[['Tract Code (id)', 'City', 'predicted_success_prob']].sort_values(by='predicted_success_prob', ascending=False).head(10))
+if __name__ == "__main__":
+    from http_backend import install
+    from instrumentation import save_profile
+    install()
+    raw_data_path = "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/completeCafeCompassData.csv"
+    cleaned_data_path = "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/cleaned_normalized_data.csv"
+    yemeni_data_path = "C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/yemeniCoffeeShopsWithSuccess.csv"
+
+    # Step 1: Clean and Normalize the data
+    #df_prepared = clean_and_prepare_dataset(raw_data_path)
+    print("step 1 done")
+    df_prepared = read_tract_table(cleaned_data_path)
+
+    # Step 2: Add custom features
+    df_features = add_custom_features(df_prepared)
+    print("step 2 done")
+
+    df_test = pd.read_csv(yemeni_data_path, usecols=['city','county', 'isSuccessful'])
+    print("step 3 done")
+
+    # Step 3: Label neighborhoods based on known Yemeni coffee shops
+    df_labeled = label_success_from_known_shops(df_features, yemeni_data_path)
+    print("step 4 done")
+    print(df_labeled.columns)
+    print(df_labeled['isSuccessful'].value_counts())
+
+    # Step 4: Train a Random Forest model and predict success probabilities
+    from huffModel import load_competitors
+    df_scored = train_success_prediction_model(df_labeled, cv='county',
+                                               competitors=load_competitors(shops_csv=yemeni_data_path))
+    print("step 5 done")
+
+    # Step 5: Save the final dataset with predicted success probabilities
+    df_scored.to_csv("final_scored_with_predictions.csv", index=False)
+    print("step 6 done")
+
+    # Output top 10 neighborhoods with highest predicted success probability
+    print(df_scored[['Tract Code (id)', 'City', 'predicted_success_prob']].sort_values(by='predicted_success_prob', ascending=False).head(10))
+
+    # Best 10 new sites once overlapping catchments are accounted for
+    from siteOptimizer import select_sites
+    sites = select_sites(df_scored, k=10)
+    print(sites[['pick_rank', 'Tract Code (id)', 'City', 'predicted_success_prob', 'marginal_gain']])
+    save_profile("normalizeData")
@@ -0,0 +1,110 @@
+import heapq
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from huffModel import EARTH_RADIUS_KM, sparse_distances
+
+# Radius of the area a shop draws most customers from
+CATCHMENT_KM = 3.0
+# New sites closer than this are never picked together
+MIN_SPACING_KM = 1.0
+# Weight of the cannibalization penalty relative to predicted success
+OVERLAP_PENALTY = 1.0
+
+
+def catchment_overlap(distance_km, radius_km=CATCHMENT_KM):
+    """Fraction of one circular catchment covered by another of the same radius, at distance_km apart."""
+    d = np.minimum(np.asarray(distance_km, dtype=float), 2 * radius_km)
+    lens = 2 * radius_km ** 2 * np.arccos(d / (2 * radius_km)) - (d / 2) * np.sqrt(4 * radius_km ** 2 - d ** 2)
+    return lens / (np.pi * radius_km ** 2)
+
+
+def grid_candidates(scored, cell_km=1.0, score_col='predicted_success_prob'):
+    """
+    Aggregates scored tracts into square grid cells (mean score, mean position) as candidate sites.
+    """
+    df = scored.dropna(subset=['lat', 'lon', score_col])
+    cell_deg_lat = cell_km / (np.pi * EARTH_RADIUS_KM / 180)
+    cell_deg_lon = cell_deg_lat / np.cos(np.radians(df['lat'].mean()))
+    cells = pd.DataFrame({
+        'cell_row': np.floor(df['lat'] / cell_deg_lat).astype(int),
+        'cell_col': np.floor(df['lon'] / cell_deg_lon).astype(int),
+        'lat': df['lat'],
+        'lon': df['lon'],
+        score_col: df[score_col],
+    })
+    grouped = cells.groupby(['cell_row', 'cell_col'], as_index=False)
+    return grouped.agg(lat=('lat', 'mean'), lon=('lon', 'mean'), **{score_col: (score_col, 'mean')},
+                       tracts=('lat', 'size'))
+
+
+def select_sites(candidates, k=10, score_col='predicted_success_prob', catchment_km=CATCHMENT_KM,
+                 min_spacing_km=MIN_SPACING_KM, overlap_penalty=OVERLAP_PENALTY):
+    """
+    Picks up to k new shop sites maximizing total predicted success minus cannibalization.
+
+    Objective for a set S of sites:
+        sum_i score_i - overlap_penalty * sum_{i<j in S} overlap_ij * min(score_i, score_j)
+    where overlap_ij is the shared fraction of the two catchments; sites closer than min_spacing_km
+    are never both selected. Adding a site can only lower the others' marginal gains, so the
+    objective is submodular and lazy greedy selection applies: stale gains sit in a max-heap and
+    only the top candidate is re-evaluated each round.
+
+    Candidate pairs come from a sparse neighbor graph (radius 2 * catchment_km), so the cost scales
+    with the number of nearby pairs rather than candidates squared.
+
+    Args:
+        candidates: DataFrame with lat, lon and score_col (tracts, or grid_candidates() cells).
+        k: Number of sites to pick; fewer are returned when no remaining site adds value.
+
+    Returns:
+        The selected rows in pick order with 'pick_rank' and 'marginal_gain' columns.
+    """
+    df = candidates.dropna(subset=['lat', 'lon', score_col])
+    scores = df[score_col].to_numpy(dtype=float)
+
+    radius = max(2 * catchment_km, min_spacing_km)
+    # Tiny floor keeps co-located candidates as stored (non-zero) pairs; only the diagonal is dropped
+    pairs = sparse_distances(df['lat'], df['lon'], df['lat'], df['lon'], cutoff_km=radius, min_km=1e-6).tocoo()
+    off_diagonal = pairs.row != pairs.col
+    neighbors = sparse.csr_matrix((pairs.data[off_diagonal], (pairs.row[off_diagonal], pairs.col[off_diagonal])),
+                                  shape=pairs.shape)
+
+    selected = np.zeros(len(df), dtype=bool)
+    picks, gains = [], []
+
+    def marginal_gain(i):
+        start, stop = neighbors.indptr[i], neighbors.indptr[i + 1]
+        near, distance = neighbors.indices[start:stop], neighbors.data[start:stop]
+        chosen = selected[near]
+        if np.any(distance[chosen] < min_spacing_km):
+            return -np.inf
+        overlap = catchment_overlap(distance[chosen], catchment_km)
+        return scores[i] - overlap_penalty * np.sum(overlap * np.minimum(scores[i], scores[near[chosen]]))
+
+    # Max-heap of (-gain, candidate, number of picks when the gain was computed)
+    heap = [(-score, i, 0) for i, score in enumerate(scores)]
+    heapq.heapify(heap)
+    while heap and len(picks) < k:
+        negative_gain, i, computed_at = heapq.heappop(heap)
+        if computed_at != len(picks):
+            heapq.heappush(heap, (-marginal_gain(i), i, len(picks)))
+            continue
+        if -negative_gain <= 0:
+            break
+        selected[i] = True
+        picks.append(i)
+        gains.append(-negative_gain)
+
+    result = df.iloc[picks].copy()
+    result['pick_rank'] = np.arange(1, len(picks) + 1)
+    result['marginal_gain'] = gains
+    return result
+
+
+if __name__ == "__main__":
+    # Example usage:
+    df_scored = pd.read_csv("C:/Users/Owner/Desktop/code/cafe-compass/final_scored_with_predictions.csv")
+    sites = select_sites(df_scored, k=10)
+    print(sites[['pick_rank', 'Tract Code (id)', 'City', 'predicted_success_prob', 'marginal_gain']])
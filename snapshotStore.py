@@ -0,0 +1,239 @@
+import os
+from datetime import date as dt_date
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from tractPreprocessor import score_new_tracts
+from tractSchema import read_tract_table
+
+SNAPSHOT_DIR = "snapshots"
+
+# Column identifying a row across collection runs, per collected table
+SNAPSHOT_KEYS = {
+    'tracts': 'GEOID',
+    'shops': 'place_id'
+}
+
+# Relative tolerance for numeric columns; tract measures are stored as float32 (tractSchema)
+FLOAT_TOLERANCE = 1e-6
+
+# Tracts within this distance of an opened, closed or changed shop are relabeled and rescored;
+# the same range the Huff features count a shop as a competitor (huffModel.CUTOFF_KM)
+SHOP_RADIUS_KM = 10.0
+
+# Collected tract measures that get a '<column>_change' trend feature
+TREND_COLUMNS = [
+    "Median Household Income",
+    "Population Density (Persons/Acre)",
+    "# of Nearby Restaurants",
+    "# of Nearby Coffee Shops",
+    "# of Nearby Mosques",
+    "transit_stops",
+    "pedestrian_score"
+]
+
+
+def snapshot_path(table: str, date: str, snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_dir, table, f"{date}.csv")
+
+
+def list_snapshots(table: str, snapshot_dir: str = SNAPSHOT_DIR) -> list:
+    """Dates (YYYY-MM-DD) of the stored snapshots of a table, oldest first."""
+    folder = os.path.join(snapshot_dir, table)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name[:-len(".csv")] for name in os.listdir(folder) if name.endswith(".csv"))
+
+
+def save_snapshot(df: pd.DataFrame, table: str, date: str = None, snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    """
+    Stores one collection run of a table under its date; a second run on the same day replaces it.
+
+    Args:
+        df: The collected table (tracts keyed by GEOID, shops by place_id).
+        table: Snapshot name, e.g. 'tracts' or 'shops'.
+        date: Run date as YYYY-MM-DD (default: today).
+    """
+    date = date or dt_date.today().isoformat()
+    path = snapshot_path(table, date, snapshot_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False)
+    print(f"✅ Snapshot of {len(df)} {table} rows saved to {path}")
+    return path
+
+
+def load_snapshot(table: str, date: str = None, snapshot_dir: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    """Loads the snapshot of a table taken on date (default: the latest one)."""
+    dates = list_snapshots(table, snapshot_dir)
+    if not dates:
+        raise FileNotFoundError(f"No {table} snapshots in {snapshot_dir}")
+    path = snapshot_path(table, date or dates[-1], snapshot_dir)
+    if table == 'tracts':
+        return read_tract_table(path)
+    return pd.read_csv(path)
+
+
+def previous_snapshot_date(table: str, date: str = None, snapshot_dir: str = SNAPSHOT_DIR):
+    """Date of the snapshot taken before date (default: before the latest one), or None."""
+    dates = list_snapshots(table, snapshot_dir)
+    date = date or (dates[-1] if dates else None)
+    earlier = [d for d in dates if d < date] if date else []
+    return earlier[-1] if earlier else None
+
+
+def snapshot_as_of(table: str, date: str, snapshot_dir: str = SNAPSHOT_DIR):
+    """Date of the latest snapshot taken on or before date, or None."""
+    dates = [d for d in list_snapshots(table, snapshot_dir) if d <= date]
+    return dates[-1] if dates else None
+
+
+def _unchanged(old: pd.Series, new: pd.Series, rtol: float) -> np.ndarray:
+    """Element-wise equality of two aligned columns; missing on both sides counts as unchanged."""
+    if is_numeric_dtype(old) and is_numeric_dtype(new):
+        a = old.to_numpy(dtype=float, na_value=np.nan)
+        b = new.to_numpy(dtype=float, na_value=np.nan)
+        return np.isclose(a, b, rtol=rtol, atol=0, equal_nan=True)
+    # Compare as objects so categoricals with different category sets still line up
+    a, b = old.astype(object), new.astype(object)
+    both_missing = (a.isna() & b.isna()).to_numpy()
+    return ((a == b).fillna(False).to_numpy(dtype=bool)) | both_missing
+
+
+def diff_snapshots(old: pd.DataFrame, new: pd.DataFrame, key: str, columns=None,
+                   rtol: float = FLOAT_TOLERANCE) -> pd.DataFrame:
+    """
+    Row-level differences between two snapshots of a table.
+
+    Rows without a key are ignored and a duplicated key keeps its last row.
+
+    Args:
+        old / new: The two snapshots.
+        key: Column identifying a row in both (see SNAPSHOT_KEYS).
+        columns: Columns compared for changed rows (default: every column in both snapshots).
+        rtol: Relative tolerance for numeric columns.
+
+    Returns:
+        DataFrame with key, 'change' ('added', 'removed' or 'changed') and 'changed_columns'
+        (';'-separated names, empty for added/removed rows). Unchanged rows are left out.
+    """
+    old = old.dropna(subset=[key]).drop_duplicates(subset=[key], keep='last').set_index(key)
+    new = new.dropna(subset=[key]).drop_duplicates(subset=[key], keep='last').set_index(key)
+    if columns is None:
+        columns = [column for column in new.columns if column in old.columns]
+
+    added = new.index.difference(old.index)
+    removed = old.index.difference(new.index)
+    common = new.index.intersection(old.index)
+
+    changed = np.zeros((len(common), len(columns)), dtype=bool)
+    for j, column in enumerate(columns):
+        changed[:, j] = ~_unchanged(old.loc[common, column], new.loc[common, column], rtol)
+    rows = changed.any(axis=1)
+    changed_columns = [';'.join(np.asarray(columns)[flags]) for flags in changed[rows]]
+
+    return pd.concat([
+        pd.DataFrame({key: added, 'change': 'added', 'changed_columns': ''}),
+        pd.DataFrame({key: removed, 'change': 'removed', 'changed_columns': ''}),
+        pd.DataFrame({key: common[rows], 'change': 'changed', 'changed_columns': changed_columns})
+    ], ignore_index=True)
+
+
+def summarize_diff(diff: pd.DataFrame) -> pd.Series:
+    """How often each column changed, plus the added/removed row counts."""
+    counts = diff.loc[diff['change'] == 'changed', 'changed_columns'].str.split(';').explode().value_counts()
+    totals = diff['change'].value_counts().reindex(['added', 'removed'], fill_value=0)
+    return pd.concat([totals, counts])
+
+
+def tracts_to_refresh(tracts: pd.DataFrame, tract_diff: pd.DataFrame = None, shops: pd.DataFrame = None,
+                      shop_diff: pd.DataFrame = None, radius_km: float = SHOP_RADIUS_KM) -> pd.DataFrame:
+    """
+    Tracts whose collected data changed since the last snapshot, plus tracts near shops that opened,
+    closed or changed (business_status, rating counts...) and so may be labeled differently.
+
+    Args:
+        tracts: Current tract snapshot with GEOID, lat and lon.
+        tract_diff: diff_snapshots() of the tract snapshots.
+        shops: Current and previous shop rows (lat, lon, place_id); removed shops only exist in the
+            previous snapshot, so pass both concatenated.
+        shop_diff: diff_snapshots() of the shop snapshots.
+        radius_km: Distance within which a shop change affects a tract.
+
+    Returns:
+        The tract rows to re-collect and rescore.
+    """
+    refresh = pd.Series(False, index=tracts.index)
+    if tract_diff is not None:
+        refresh |= tracts['GEOID'].isin(tract_diff.loc[tract_diff['change'] != 'removed', 'GEOID'])
+
+    if shop_diff is not None and shops is not None and len(shop_diff):
+        from huffModel import sparse_distances
+        moved = shops[shops['place_id'].isin(shop_diff['place_id'])].dropna(subset=['lat', 'lon'])
+        located = tracts['lat'].notna() & tracts['lon'].notna()
+        near = sparse_distances(tracts.loc[located, 'lat'], tracts.loc[located, 'lon'],
+                                moved['lat'], moved['lon'], cutoff_km=radius_km)
+        refresh[located[located].index[near.getnnz(axis=1) > 0]] = True
+
+    return tracts[refresh]
+
+
+def merge_refreshed(full: pd.DataFrame, refreshed: pd.DataFrame, key: str = 'GEOID') -> pd.DataFrame:
+    """Writes re-collected rows back into the full table (matched on key); new keys are appended."""
+    kept = full[~full[key].isin(refreshed[key])]
+    merged = pd.concat([kept, refreshed], ignore_index=True)
+    position = pd.Series(np.arange(len(full)), index=full[key].to_numpy())
+    position = position[~position.index.duplicated()]
+    # Existing tracts keep their position, new ones go last
+    order = position.reindex(merged[key].to_numpy()).to_numpy(dtype=float, na_value=np.nan)
+    order = np.where(np.isnan(order), len(full) + np.arange(len(merged)), order)
+    return merged.iloc[np.argsort(order, kind='stable')].reset_index(drop=True)
+
+
+def rescore_changed(raw: pd.DataFrame, previous_scored: pd.DataFrame, changed_geoids,
+                    bundle_path: str) -> pd.DataFrame:
+    """
+    Scores only the changed tracts with a saved model bundle and reuses every other previous score.
+
+    Added tracts must be among changed_geoids (diff_snapshots and tracts_to_refresh include them);
+    tracts no longer in raw are dropped, and so are changed tracts that can no longer be scored
+    (e.g. a measure became NaN) rather than keeping their stale score.
+    """
+    stale = raw['GEOID'].isin(changed_geoids)
+    previous = previous_scored[previous_scored['GEOID'].isin(raw.loc[~stale, 'GEOID'])]
+    print(f"Rescoring {int(stale.sum())} of {len(raw)} tracts")
+    if not stale.any():
+        return previous.reset_index(drop=True)
+    rescored = score_new_tracts(raw[stale].copy(), bundle_path)
+    unscorable = int(stale.sum()) - len(rescored)
+    if unscorable:
+        print(f"⚠️ {unscorable} changed tracts can't be scored anymore and were removed.")
+    return merge_refreshed(previous, rescored)
+
+
+def add_trend_features(current: pd.DataFrame, previous: pd.DataFrame, columns=TREND_COLUMNS,
+                       key: str = 'GEOID') -> pd.DataFrame:
+    """
+    Adds '<column>_change' (current minus previous snapshot value) for each trend column.
+
+    Tracts absent from the previous snapshot get NaN.
+    """
+    columns = [column for column in columns if column in current.columns and column in previous.columns]
+    before = previous.dropna(subset=[key]).drop_duplicates(subset=[key], keep='last').set_index(key)[columns]
+    aligned = before.reindex(current[key].to_numpy())
+    for column in columns:
+        current[f"{column}_change"] = current[column].to_numpy(dtype=float, na_value=np.nan) \
+            - aligned[column].to_numpy(dtype=float, na_value=np.nan)
+    return current
+
+
+if __name__ == "__main__":
+    # Example usage: snapshot today's collection run and list what changed since the previous one
+    tracts = read_tract_table("C:/Users/Owner/Desktop/code/cafe-compass/csvFiles/completeCafeCompassData.csv")
+    save_snapshot(tracts, 'tracts')
+    previous_date = previous_snapshot_date('tracts')
+    if previous_date:
+        diff = diff_snapshots(load_snapshot('tracts', previous_date), tracts, key='GEOID')
+        print(summarize_diff(diff))
+        print(f"{len(tracts_to_refresh(tracts, diff))} tracts to refresh")
@@ -0,0 +1,191 @@
+import re
+import joblib
+import numpy as np
+import pandas as pd
+
+from featureEngineering import add_custom_features
+
+# Numeric columns min-max normalized before modeling
+numeric_cols = [
+    "Median Age",
+    "Median Household Income",
+    "Percent People in Poverty",
+    "Population Density (Persons/Acre)",
+    "# of Nearby Restaurants",
+    "# of Nearby Coffee Shops",
+    "# of Nearby Mosques",
+    "transit_stops",
+    "pedestrian_score"
+]
+
+INCOME_BINS = [0, 35000, 60000, 100000, float('inf')]
+INCOME_LABELS = ['Low', 'Middle', 'Upper-Middle', 'High']
+DENSITY_BINS = [0, 5, 20, 50, float('inf')]
+DENSITY_LABELS = ['Low', 'Moderate', 'Dense', 'Very Dense']
+
+# Column transform() stamps on every scaled row: which fit produced it
+FIT_ID_COLUMN = 'scaler_fit_id'
+
+
+def clean_city_name(city):
+    """Normalize city names by removing unwanted suffixes and punctuation."""
+    if isinstance(city, str):
+        city = city.lower().strip()  # Convert to lowercase and remove extra spaces
+        city = re.sub(r'\s*twp$', '', city)  # Remove 'twp' (township) suffix
+        city = re.sub(r'\s*\(.*\)', '', city)  # Remove text inside parentheses
+    return city
+
+
+class TractPreprocessor:
+    """
+    Fitted preprocessing for tract rows: brackets, min-max scaling, city cleanup and custom features.
+
+    Fit once on the training corpus (in memory or chunk by chunk), then transform new tracts with
+    the same statistics instead of re-normalizing the whole dataset.
+    """
+
+    def __init__(self, columns=numeric_cols):
+        self.columns = list(columns)
+        self.data_min_ = None
+        self.data_max_ = None
+
+    def prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Row-local cleanup that runs before normalization: drop incomplete rows, poverty, brackets."""
+        # Only the scaled measures and the location are required; a missing GEOID or county_id
+        # doesn't make a tract unusable
+        required = self.columns + ['lat', 'lon']
+        complete = df[required].notna().all(axis=1)
+        if not complete.all():
+            print(f"⚠️ Dropped {int((~complete).sum())} of {len(df)} tracts missing a scaled measure or lat/lon.")
+        df = df[complete].copy()
+
+        # Convert Percent People in Poverty to decimal
+        df['Percent People in Poverty'] = df['Percent People in Poverty'] / 100
+
+        # Create income brackets
+        df['income_bracket'] = pd.cut(df['Median Household Income'], bins=INCOME_BINS, labels=INCOME_LABELS)
+
+        # Create density brackets
+        df['density_bracket'] = pd.cut(df['Population Density (Persons/Acre)'], bins=DENSITY_BINS, labels=DENSITY_LABELS)
+        return df
+
+    def partial_fit(self, prepared: pd.DataFrame) -> "TractPreprocessor":
+        """Folds one prepared chunk into the running per-column min/max."""
+        if prepared.empty:
+            return self
+        chunk_min, chunk_max = prepared[self.columns].min(), prepared[self.columns].max()
+        self.data_min_ = chunk_min if self.data_min_ is None else np.fmin(self.data_min_, chunk_min)
+        self.data_max_ = chunk_max if self.data_max_ is None else np.fmax(self.data_max_, chunk_max)
+        return self
+
+    def fit(self, prepared: pd.DataFrame) -> "TractPreprocessor":
+        self.data_min_ = None
+        self.data_max_ = None
+        return self.partial_fit(prepared)
+
+    def transform(self, prepared: pd.DataFrame) -> pd.DataFrame:
+        """Scales the numeric columns with the fitted min/max and cleans city names."""
+        if self.data_min_ is None:
+            raise ValueError("TractPreprocessor must be fitted before transform")
+        df = prepared.copy()
+        # Same as MinMaxScaler: constant columns map to 0
+        data_range = (self.data_max_ - self.data_min_).replace(0, 1)
+        # Float32 columns (tractSchema) are cast back so the float64 statistics don't promote them;
+        # integer columns like income stay promoted to float, the scaled values are fractions
+        float32 = {column: np.float32 for column in self.columns if df[column].dtype == np.float32}
+        df[self.columns] = ((df[self.columns] - self.data_min_) / data_range).astype(float32)
+        df['City'] = df['City'].apply(clean_city_name)
+        df[FIT_ID_COLUMN] = self.fit_id
+        return df
+
+    @property
+    def fit_id(self):
+        """Short hash of the fitted columns and min/max, identical for every chunk of a streamed fit."""
+        if self.data_min_ is None:
+            return None
+        return joblib.hash((self.columns, self.data_min_.to_numpy(), self.data_max_.to_numpy()))[:12]
+
+    def unscale(self, column: str, values):
+        """Maps min-max scaled values of one column back to raw units."""
+        data_range = self.data_max_[column] - self.data_min_[column]
+        return np.asarray(values, dtype=float) * (data_range or 1) + self.data_min_[column]
+
+    def mismatched_columns(self, transformed: pd.DataFrame, atol: float = 1e-6) -> list:
+        """
+        Problems that show transformed rows weren't scaled by this fit: scaled columns that are
+        missing or fall outside [0, 1] (unscaled data), and a different FIT_ID_COLUMN stamp (another
+        fit of the same columns). Any subset of the fitted rows passes.
+        """
+        if self.data_min_ is None:
+            return list(self.columns)
+        mismatched = []
+        for column in self.columns:
+            if column not in transformed.columns:
+                mismatched.append(column)
+                continue
+            low, high = transformed[column].min(), transformed[column].max()
+            if low < -atol or high > 1 + atol:
+                mismatched.append(column)
+        # Files cleaned before fits were stamped only get the range check
+        if FIT_ID_COLUMN in transformed.columns:
+            stamps = transformed[FIT_ID_COLUMN].dropna().unique()
+            if any(stamp != self.fit_id for stamp in stamps):
+                mismatched.append(FIT_ID_COLUMN)
+        return mismatched
+
+    def transform_raw(self, raw: pd.DataFrame, with_features: bool = True) -> pd.DataFrame:
+        """Raw tract rows -> model-ready rows (prepare, scale, optionally add custom features)."""
+        df = self.transform(self.prepare(raw))
+        return add_custom_features(df) if with_features else df
+
+    def save(self, path: str) -> None:
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str) -> "TractPreprocessor":
+        return joblib.load(path)
+
+
+def save_model_bundle(path: str, model, features, preprocessor: TractPreprocessor = None,
+                      explainer: dict = None, huff: dict = None) -> None:
+    """
+    Serializes the trained model together with its feature list, fitted preprocessor, compiled
+    tree paths (modelExplanation.compile_tree_paths) for explaining new scores and the Huff
+    competitors and demand points (huffModel.add_huff_features kwargs) when that feature is used.
+    """
+    joblib.dump({'model': model, 'features': list(features), 'preprocessor': preprocessor, 'explainer': explainer,
+                 'huff': huff}, path)
+
+
+def load_model_bundle(path: str) -> dict:
+    return joblib.load(path)
+
+
+def score_new_tracts(raw: pd.DataFrame, bundle_path: str) -> pd.DataFrame:
+    """
+    Scores raw tract rows with a saved bundle; nothing is refit, so existing scores don't shift.
+
+    Each scored tract also gets its top contributing features (modelExplanation.EXPLANATION_COLUMN).
+    """
+    bundle = load_model_bundle(bundle_path)
+    if bundle['preprocessor'] is None:
+        raise ValueError(f"{bundle_path} was saved without a fitted preprocessor")
+    df = bundle['preprocessor'].transform_raw(raw)
+    if df.empty:
+        # Every row was dropped by prepare(); nothing to score
+        df['predicted_success_prob'] = pd.Series(dtype=float)
+        return df
+    if bundle.get('huff') is not None:
+        # Share of the training tracts' demand, against the competitors the model was trained with
+        from huffModel import add_huff_features
+        df = add_huff_features(df, **bundle['huff'])
+    missing = [feature for feature in bundle['features'] if feature not in df.columns]
+    if missing:
+        # e.g. huff_market_share in a bundle saved before its competitors were bundled
+        raise ValueError(f"Raw tracts are missing model features {missing}; add them before scoring")
+    from tractSchema import feature_frame  # tractSchema imports this module
+    X = feature_frame(df, bundle['features'])
+    df['predicted_success_prob'] = bundle['model'].predict_proba(X)[:, 1]
+    # Bundles saved before explanations were added compile their tree paths here
+    from modelExplanation import add_explanations
+    return add_explanations(df, bundle['model'], X, bundle.get('explainer'))
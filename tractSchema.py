@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype, is_float_dtype
+
+from tractPreprocessor import DENSITY_LABELS, INCOME_LABELS
+
+# Identifiers keep exact values; county FIPS fits in int16, GEOIDs need 64 bits
+IDENTIFIER_DTYPES = {
+    'Tract Code (id)': 'float64',  # e.g. 5030.01, turned into GEOIDs
+    'county_id': 'Int16',
+    'GEOID': 'Int64'
+}
+
+CATEGORY_DTYPES = {
+    'City': 'category',
+    'county': 'category',
+    'income_bracket': CategoricalDtype(INCOME_LABELS, ordered=True),
+    'density_bracket': CategoricalDtype(DENSITY_LABELS, ordered=True)
+}
+
+# Full precision so geocoding cache keys (5 decimals) and map positions don't move
+COORDINATE_DTYPES = {
+    'lat': 'float64',
+    'lon': 'float64'
+}
+
+# Every other float column (measures, ratios, normalized values, scores) is stored as float32,
+# the precision the RandomForest splits on anyway
+MEASURE_DTYPE = np.float32
+
+
+def tract_dtypes(columns) -> dict:
+    """Schema dtypes for the given tract columns (columns not listed fall back to MEASURE_DTYPE if float)."""
+    schema = {**IDENTIFIER_DTYPES, **CATEGORY_DTYPES, **COORDINATE_DTYPES}
+    return {column: schema[column] for column in columns if column in schema}
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Casts a tract DataFrame to the compact schema: float32 measures, Int16/Int64 ids, categoricals."""
+    dtypes = tract_dtypes(df.columns)
+    for column in df.columns:
+        if column in dtypes:
+            if column == 'county_id' and is_float_dtype(df[column]):
+                df[column] = df[column].round()
+            df[column] = df[column].astype(dtypes[column])
+        elif is_float_dtype(df[column]) and df[column].dtype != MEASURE_DTYPE:
+            df[column] = df[column].astype(MEASURE_DTYPE)
+    return df
+
+
+def read_tract_table(path: str, **kwargs) -> pd.DataFrame:
+    """Reads a tract CSV straight into the compact schema."""
+    header = pd.read_csv(path, nrows=0).columns
+    return apply_schema(pd.read_csv(path, dtype=tract_dtypes(header), **kwargs))
+
+
+def feature_frame(df: pd.DataFrame, features) -> pd.DataFrame:
+    """
+    The model's feature columns as one float32 block.
+
+    np.asarray() of the result is a view of that block, so sklearn (which works in float32)
+    takes it without the float64 consolidation and float32 conversion copies.
+    """
+    values = np.empty((len(df), len(features)), dtype=MEASURE_DTYPE, order='F')
+    for j, feature in enumerate(features):
+        values[:, j] = df[feature].to_numpy(dtype=MEASURE_DTYPE, na_value=np.nan)
+    return pd.DataFrame(values, index=df.index, columns=list(features), copy=False)
+
+
+def feature_matrix(df: pd.DataFrame, features) -> np.ndarray:
+    """Zero-copy (n_tracts, n_features) float32 view of feature_frame(df, features)."""
+    return np.asarray(feature_frame(df, features))
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 2**20